@@ -0,0 +1,225 @@
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from collections import deque
+from datetime import datetime
+import json
+import os
+import threading
+
+ALERT_HISTORY_SIZE = 1000  # Transitions kept per tracker
+
+class AlertLog:
+    """
+    Append-only JSON-lines journal of an AlertTracker, so transitions
+    survive a crash and seq never goes back. Each line is either a
+    checkpoint (AlertTracker.to_dict) or one evaluation's transitions
+    together with the alerts active after it. Lines are flushed as they
+    are written; after COMPACT_LINES of them the journal is rewritten as a
+    single checkpoint.
+    """
+
+    COMPACT_LINES = 1000
+
+    def __init__(self, path: str, checkpoint: Dict):
+        self.path = path
+        self._file = None
+        self.checkpoint(checkpoint)
+
+    @staticmethod
+    def replay(path: str) -> Optional[Dict]:
+        """The tracker state journaled at path, in to_dict form, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        data = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line torn by a crash; only the last one can be
+                    break
+                if "history" in entry:
+                    data = entry
+                elif data is not None:
+                    data["history"].extend(entry["transitions"])
+                    data["active"] = entry["active"]
+                    if entry["transitions"]:
+                        data["last_seq"] = entry["transitions"][-1]["seq"]
+        return data
+
+    def append(self, entry: Dict, checkpoint: Dict):
+        """Journals an evaluation; checkpoint is the tracker state after it, used when compacting."""
+        if self._lines >= self.COMPACT_LINES:
+            self.checkpoint(checkpoint)
+            return
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._lines += 1
+
+    def checkpoint(self, data: Dict):
+        """Replaces the journal with a single checkpoint of data."""
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps(data) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lines = 0
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+class AlertTracker:
+    """
+    Tracks which alert rules are firing for one engine. Each evaluation
+    diffs the rule alerts of a snapshot (dicts with rule_id, type and
+    message) against the active ones and records a "fired" or "resolved"
+    transition, numbered by seq, for each rule that changed. Active alerts
+    keep the timestamp they fired at; only their messages are refreshed.
+
+    Evaluating the same (data version, visible periods) twice does nothing.
+    Callers that may evaluate concurrently pass increasing revisions, and
+    evaluations older than the latest applied one are ignored.
+
+    With log set (see open), every evaluation that changes anything is
+    journaled before evaluate returns.
+    """
+
+    def __init__(self, history_size: int = ALERT_HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self.log: Optional[AlertLog] = None
+        self._active: Dict[str, Dict] = {}
+        self._history: Deque[Dict] = deque(maxlen=history_size)
+        self._last_seq = 0
+        self._key: Optional[Tuple[int, int]] = None
+        self._revision = -1
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the latest transition; 0 before the first."""
+        return self._last_seq
+
+    def is_current(self, version: int, visible_periods: int) -> bool:
+        return self._key == (version, visible_periods)
+
+    def active(self) -> List[Dict]:
+        """The firing alerts, in rule order, stamped with when each fired."""
+        return list(self._active.values())
+
+    def stamp(self, alerts: Sequence[Dict]) -> List[Dict]:
+        """
+        Copies of rule alerts (from a snapshot) with the timestamp each
+        fired at if it is active, and the current time otherwise. Leaves
+        the tracker unchanged.
+        """
+        now = datetime.now().isoformat()
+        active = self._active
+        return [{**alert, "timestamp": active[alert["rule_id"]]["timestamp"] if alert["rule_id"] in active else now}
+                for alert in alerts]
+
+    def evaluate(self, snapshot, revision: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Brings the active alerts up to date with snapshot (an ROISnapshot)
+        and returns them, or returns None if a later revision was already
+        evaluated.
+        """
+        key = (snapshot.version, snapshot.visible_periods)
+        with self._lock:
+            if revision is not None:
+                if revision < self._revision:
+                    return None
+                self._revision = revision
+            if key == self._key:
+                return self.active()
+
+            now = datetime.now().isoformat()
+            firing = {alert["rule_id"]: alert for alert in snapshot.alerts}
+            transitions = []
+            for rule_id, alert in self._active.items():
+                if rule_id not in firing:
+                    transitions.append(self._record("resolved", alert, now, snapshot.visible_periods))
+            active = {}
+            for rule_id, alert in firing.items():
+                previous = self._active.get(rule_id)
+                if previous is None:
+                    transitions.append(self._record("fired", alert, now, snapshot.visible_periods))
+                active[rule_id] = {**alert, "timestamp": previous["timestamp"] if previous else now}
+            changed = transitions or active != self._active
+            self._active = active
+            self._key = key
+            if changed and self.log is not None:
+                self.log.append({"transitions": transitions, "active": self.active()}, self._to_dict())
+            return self.active()
+
+    def _record(self, event: str, alert: Dict, timestamp: str, period: int) -> Dict:
+        self._last_seq += 1
+        transition = {
+            "seq": self._last_seq,
+            "event": event,
+            "rule_id": alert["rule_id"],
+            "type": alert["type"],
+            "message": alert["message"],
+            "period": period,
+            "timestamp": timestamp,
+        }
+        self._history.append(transition)
+        return transition
+
+    def events(self, since: int = 0) -> Tuple[List[Dict], bool]:
+        """
+        Transitions with seq greater than since, oldest first, and whether
+        some of them have already dropped out of the bounded history.
+        """
+        with self._lock:
+            history = list(self._history)
+        if not history:
+            return [], since < self._last_seq
+        # seq increases by one per transition, so index by offset
+        start = max(0, since + 1 - history[0]["seq"])
+        return history[start:], since + 1 < history[0]["seq"]
+
+    def _to_dict(self) -> Dict:
+        return {
+            "last_seq": self._last_seq,
+            "active": self.active(),
+            "history": list(self._history),
+        }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return self._to_dict()
+
+    @classmethod
+    def from_dict(cls, data: Dict, history_size: int = ALERT_HISTORY_SIZE) -> "AlertTracker":
+        """
+        Restores a tracker saved with to_dict. It is re-evaluated against the
+        next snapshot, so alerts still firing are not reported again.
+        """
+        tracker = cls(history_size)
+        tracker._last_seq = data["last_seq"]
+        tracker._active = {alert["rule_id"]: alert for alert in data["active"]}
+        tracker._history.extend(data["history"])
+        return tracker
+
+    @classmethod
+    def open(cls, path: str, history_size: int = ALERT_HISTORY_SIZE) -> "AlertTracker":
+        """
+        Restores the tracker journaled at path, if any (a file saved by
+        to_dict is a journal of one checkpoint), and journals to it from
+        then on. The journal starts out compacted.
+        """
+        data = AlertLog.replay(path)
+        tracker = cls.from_dict(data, history_size) if data is not None else cls(history_size)
+        tracker.log = AlertLog(path, tracker._to_dict())
+        return tracker
+
+    def close(self):
+        """Compacts and closes the journal; later evaluations are kept in memory only."""
+        with self._lock:
+            if self.log is not None:
+                self.log.checkpoint(self._to_dict())
+                self.log.close()
+                self.log = None
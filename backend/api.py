@@ -1,8 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
-from roi_engine import ROIEngine, TransactionPeriod
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractAsyncContextManager
+from functools import partial
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from metrics import REGISTRY, STAGE_SECONDS, Gauge, MetricsMiddleware, SlowCallProfiler
+from montecarlo import DEFAULT_PATHS
+from period_store import PeriodStore
+from roi_engine import EngineState, ROIEngine, ROISnapshot, TransactionPeriod
+from scenarios import scenario_rows
+from tenants import EngineRegistry, EngineStorage, TenantState, check_tenant_id
 
 app = FastAPI()
 
@@ -13,11 +29,130 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# Initialize ROI Engine
-roi_engine = ROIEngine()
-current_period = 0  # Track the current period
+# Request counts and latencies for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# CPU-heavy work (building and encoding results, scenario sweeps, batch
+# validation) and disk I/O (engine writes, loading and saving tenants) run
+# here rather than on the event loop. Reads only use published
+# EngineStates, so need no locks; writes hold the tenant's registry lock,
+# which keeps them apart from each other and from the tenant being saved.
+compute_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ROI_COMPUTE_WORKERS", min(4, os.cpu_count() or 1))),
+    thread_name_prefix="roi-compute",
+)
+
+# One ROI engine per tenant. Routes are served both unprefixed, for the
+# default tenant, and under /tenants/{tenant_id}.
+DEFAULT_TENANT = "default"
+registry = EngineRegistry(
+    storage=EngineStorage(os.environ.get("ROI_DATA_DIR", "data")),
+    memory_budget=int(os.environ.get("ROI_MEMORY_BUDGET_MB", "512")) * 1024 * 1024,
+    executor=compute_pool,
+)
+router = APIRouter()
+
+# Setting ROI_PROFILE_SLOW_MS profiles a sample of compute pool calls, in
+# the worker running them, and logs the profile of slow ones
+slow_ms = os.environ.get("ROI_PROFILE_SLOW_MS")
+compute_profiler = SlowCallProfiler(
+    float(slow_ms) / 1000, float(os.environ.get("ROI_PROFILE_SAMPLE_RATE", "0.01"))) if slow_ms else None
+
+T = TypeVar("T")
+
+async def run_compute(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Runs fn in the compute pool and waits for it without blocking the event loop."""
+    if compute_profiler is not None:
+        fn, args = compute_profiler.call, (fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(compute_pool, partial(fn, *args, **kwargs))
+
+Gauge("roi_tenants_loaded", "Tenants whose engines are held in memory",
+      function=lambda: len(registry))
+Gauge("roi_engine_periods", "Periods held by in-memory engines, across tenants",
+      function=lambda: sum(state.engine.period_count for state in registry.tenants().values()))
+Gauge("roi_engine_memory_bytes", "Memory used by in-memory engines, across tenants",
+      function=lambda: registry.nbytes)
+Gauge("roi_engine_memory_budget_bytes", "Engine memory above which tenants are evicted",
+      function=lambda: registry.memory_budget)
+Gauge("roi_response_cache_bytes", "Encoded /roi bodies held in the response cache",
+      function=lambda: _roi_responses.nbytes)
+
+def _default_tenant(request: Request):
+    request.state.tenant_id = DEFAULT_TENANT
+
+def _path_tenant(request: Request, tenant_id: str):
+    request.state.tenant_id = tenant_id
+
+def current_tenant_id(request: Request) -> str:
+    """The tenant a route serves, pinned by the router mount it was reached through."""
+    return request.state.tenant_id
+
+async def get_tenant(tenant_id: str) -> TenantState:
+    try:
+        return await registry.fetch(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def writing_tenant(tenant_id: str) -> AbstractAsyncContextManager:
+    """registry.writing, rejecting invalid tenant IDs before anything is loaded."""
+    try:
+        check_tenant_id(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return registry.writing(tenant_id)
+
+async def _evaluate_alerts(tenant: TenantState):
+    """
+    Brings the tenant's alert tracker up to date with its data and replay
+    position. Runs after every write, so transitions carry the time of the
+    change; rules only run when either changed.
+    """
+    while True:
+        engine = tenant.engine
+        state, current_period, revision = engine.state, tenant.current_period, tenant.revision
+        tracker = engine.alert_tracker
+        if tracker.is_current(state.version, len(range(state.periods)[:current_period])):
+            return
+        snapshot = await run_compute(engine.snapshot, current_period, state=state)
+        # Journals any transitions, so it runs in the pool too. None means a
+        # later change was evaluated meanwhile; catch up with it
+        if await run_compute(tracker.evaluate, snapshot, revision) is not None:
+            return
+
+# Alert evaluations started by writes; held so they are not garbage collected
+_alert_tasks: Set["asyncio.Task"] = set()
+# The latest of them per tenant, until it finishes
+_pending_alerts: Dict[str, "asyncio.Task"] = {}
+
+def _notify_changed(tenant: TenantState):
+    """Wakes the tenant's watchers and records any alert transitions the change caused."""
+    tenant.notify_changed()
+    task = asyncio.ensure_future(_evaluate_alerts(tenant))
+    _alert_tasks.add(task)
+    _pending_alerts[tenant.tenant_id] = task
+
+    def done(task: "asyncio.Task"):
+        _alert_tasks.discard(task)
+        if _pending_alerts.get(tenant.tenant_id) is task:
+            del _pending_alerts[tenant.tenant_id]
+    task.add_done_callback(done)
+
+async def _current_alerts(tenant: TenantState) -> Tuple[EngineState, int, List[Dict]]:
+    """
+    The tenant's state and current_period along with its active alerts,
+    once the evaluations started by earlier writes have finished. Reads
+    never evaluate the rules themselves.
+    """
+    while True:
+        pending = _pending_alerts.get(tenant.tenant_id)
+        if pending is None or pending.done():
+            engine = tenant.engine
+            return engine.state, tenant.current_period, engine.alert_tracker.active()
+        # wait() rather than await, so a cancelled read does not cancel the evaluation
+        await asyncio.wait([pending])
 
 class PeriodData(BaseModel):
     period: str
@@ -28,8 +163,9 @@ class PeriodData(BaseModel):
     cc_rate: float
     conv_fee: float
 
-@app.post("/period")
-async def add_period(period_data: PeriodData):
+@router.post("/period")
+async def add_period(period_data: PeriodData, tenant_id: str = Depends(current_tenant_id)):
+    writing = writing_tenant(tenant_id)
     try:
         transaction_period = TransactionPeriod(
             period=period_data.period,
@@ -40,56 +176,507 @@ async def add_period(period_data: PeriodData):
             cc_rate=period_data.cc_rate,
             conv_fee=period_data.conv_fee
         )
-        roi_engine.add_period(transaction_period)
+        async with writing as tenant:
+            await run_compute(tenant.engine.add_period, transaction_period)
+            _notify_changed(tenant)
+        await registry.enforce_budget_async()
         return {"message": "Period data added successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.delete("/periods")
-async def delete_all_periods():
+BATCH_CHUNK_SIZE = 1000  # Rows validated per pydantic call
+MAX_REPORTED_ERRORS = 1000  # Row errors returned in a batch response
+
+period_batch_adapter = TypeAdapter(List[PeriodData])
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+        for e in error.errors()
+    )
+
+async def _iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yields the lines of a streamed request body without buffering all of it."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+async def _iter_rows(request: Request) -> AsyncIterator[Tuple[int, Union[Dict, Exception]]]:
+    """
+    Parses a streamed NDJSON or CSV body into (row number, row dict) pairs.
+    Rows that cannot be parsed are yielded with the exception instead.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    header = None
+    row_number = 0
+    async for raw_line in _iter_lines(request):
+        if not raw_line.strip():
+            continue
+        if is_csv and header is None:
+            header = next(csv.reader([raw_line.decode("utf-8").strip()]))
+            continue
+        row_number += 1
+        try:
+            line = raw_line.decode("utf-8").strip()
+            if is_csv:
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+                yield row_number, dict(zip(header, values))
+            else:
+                yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, e
+
+def _validate_chunk(chunk: List[Tuple[int, Dict]], labels: List[str],
+                    columns: Dict[str, List], errors: List[Dict]):
+    """Validates a chunk of rows, appending valid ones to labels/columns."""
+    try:
+        periods = period_batch_adapter.validate_python([row for _, row in chunk])
+    except ValidationError:
+        # Fall back to row-by-row validation to find the bad rows
+        periods = []
+        for row_number, row in chunk:
+            try:
+                periods.append(PeriodData.model_validate(row))
+            except ValidationError as e:
+                errors.append({"row": row_number, "error": _format_validation_error(e)})
+    for period in periods:
+        labels.append(period.period)
+        for name, values in columns.items():
+            values.append(getattr(period, name))
+
+@router.post("/periods/batch")
+async def add_periods_batch(request: Request, tenant_id: str = Depends(current_tenant_id)):
+    """
+    Bulk-load periods from a streamed body: NDJSON (one period object per
+    line) by default, or CSV with a header row when the content type is
+    text/csv. Valid rows are appended in one atomic step; invalid rows are
+    reported by row number without failing the batch.
+    """
+    labels: List[str] = []
+    columns: Dict[str, List] = {name: [] for name in PeriodStore.COLUMNS}
+    errors: List[Dict] = []
+    chunk: List[Tuple[int, Dict]] = []
+    try:
+        async for row_number, row in _iter_rows(request):
+            if isinstance(row, Exception):
+                errors.append({"row": row_number, "error": str(row)})
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                await run_compute(_validate_chunk, chunk, labels, columns, errors)
+                chunk = []
+        if chunk:
+            await run_compute(_validate_chunk, chunk, labels, columns, errors)
+        if labels:
+            # Look the tenant up only once the body is read, so it cannot be
+            # evicted while the upload streams in
+            async with writing_tenant(tenant_id) as tenant:
+                await run_compute(tenant.engine.add_columns, labels, columns)
+                _notify_changed(tenant)
+            await registry.enforce_budget_async()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "message": f"Added {len(labels)} periods, {len(errors)} rows rejected",
+        "added": len(labels),
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
+
+@router.delete("/periods")
+async def delete_all_periods(tenant_id: str = Depends(current_tenant_id)):
     """Delete all periods from the ROI engine"""
+    writing = writing_tenant(tenant_id)
     try:
-        roi_engine.periods.clear()
+        async with writing as tenant:
+            await run_compute(tenant.engine.clear_periods)
+            _notify_changed(tenant)
         return {"message": "All periods deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/roi")
-async def get_roi():
+ROI_CACHE_BYTES = int(os.environ.get("ROI_CACHE_MB", "64")) * 1024 * 1024  # Encoded /roi body bytes kept
+
+RoiKey = Tuple[str, int, int, int]
+
+class ResponseCache:
+    """
+    LRU of encoded /roi responses, keyed on (tenant, data version,
+    current_period, last alert transition) and bounded by the total size of
+    the bodies. Versions and alert seqs only grow, so caching a tenant's
+    response drops its entries for older ones, which can no longer be
+    served; a response older than one already cached is not kept at all.
+    Only touched from the event loop.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[RoiKey, Tuple[str, bytes]]" = OrderedDict()
+        self._tenant_keys: Dict[str, Set[RoiKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RoiKey) -> Optional[Tuple[str, bytes]]:
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: RoiKey, response: Tuple[str, bytes]):
+        tenant_id, version, _, alert_seq = key
+        if key in self._entries or len(response[1]) > self.max_bytes:
+            return
+        keys = self._tenant_keys.get(tenant_id, ())
+        if any(k[1] > version or k[3] > alert_seq for k in keys):
+            return
+        for stale in [k for k in keys if k[1] < version or k[3] < alert_seq]:
+            self._remove(stale)
+        self._entries[key] = response
+        self._tenant_keys.setdefault(tenant_id, set()).add(key)
+        self.nbytes += len(response[1])
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: RoiKey):
+        self.nbytes -= len(self._entries.pop(key)[1])
+        keys = self._tenant_keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._tenant_keys[key[0]]
+
+    def clear(self):
+        self._entries.clear()
+        self._tenant_keys.clear()
+        self.nbytes = 0
+
+# Encoded /roi bodies and their ETags. Versions are never reused within a
+# process, and the process token keeps ETags from an earlier run from
+# matching.
+_roi_responses = ResponseCache(ROI_CACHE_BYTES)
+# Encodes in progress, so concurrent misses for one key share a single one
+_roi_pending: Dict[RoiKey, "asyncio.Future[Tuple[str, bytes]]"] = {}
+_process_token = uuid.uuid4().hex[:12]
+
+ENCODE_CHUNK_ROWS = 2000  # Result rows per json.dumps call
+
+_dumps = partial(json.dumps, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def _encode_roi(engine: ROIEngine, state: EngineState, current_period: int,
+                alerts: List[Dict], alert_seq: int) -> Tuple[str, bytes]:
+    """Builds the ETag and JSON body of /roi for one published engine state."""
+    snapshot = engine.snapshot(current_period, state=state)
+    # One json.dumps call holds the GIL throughout, so build and encode the
+    # rows in chunks to let the event loop thread run in between and never
+    # hold every row dict at once. rows() times the building as result_rows;
+    # serialization covers only the encoding, summed over the chunks.
+    chunks = []
+    encode_seconds = 0.0
+    for i in range(0, snapshot.visible_periods + 1, ENCODE_CHUNK_ROWS):
+        rows = snapshot.rows(i, i + ENCODE_CHUNK_ROWS)
+        start = time.perf_counter()
+        chunks.append(_dumps(rows)[1:-1])
+        encode_seconds += time.perf_counter() - start
+    start = time.perf_counter()
+    body = (f'{{"results":[{",".join(chunks)}],"alerts":{_dumps(alerts)},'
+            f'"current_period":{_dumps(current_period)}}}').encode("utf-8")
+    STAGE_SECONDS.labels("serialization").observe(encode_seconds + time.perf_counter() - start)
+    return f'"{_process_token}-{state.version}-{current_period}-{alert_seq}"', body
+
+async def _roi_response(tenant: TenantState) -> Tuple[str, bytes]:
+    """Returns the ETag and body of the tenant's /roi response, from the cache if possible."""
+    # The state and period are read together with the alerts, after the last await
+    state, current_period, alerts = await _current_alerts(tenant)
+    alert_seq = tenant.engine.alert_tracker.last_seq
+    key = (tenant.tenant_id, state.version, current_period, alert_seq)
+    cached = _roi_responses.get(key)
+    if cached is not None:
+        return cached
+    pending = _roi_pending.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(
+            run_compute(_encode_roi, tenant.engine, state, current_period, alerts, alert_seq))
+        _roi_pending[key] = pending
+        pending.add_done_callback(lambda _: _roi_pending.pop(key, None))
+    # Shielded so one waiter disconnecting does not cancel it for the rest
+    response = await asyncio.shield(pending)
+    _roi_responses.put(key, response)
+    return response
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+@router.get("/roi")
+async def get_roi(request: Request, tenant_id: str = Depends(current_tenant_id)):
+    """
+    The ROI results, alerts and current period. Bodies are cached per data
+    version and period, and carry an ETag; a request whose If-None-Match
+    matches gets an empty 304 instead.
+    """
+    tenant = await get_tenant(tenant_id)
+    try:
+        etag, body = await _roi_response(tenant)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # no-cache: clients may store the body but must revalidate it every time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _forecast_payload(snapshot: ROISnapshot) -> Dict:
+    return {
+        "slope": snapshot.forecast_slope,
+        "intercept": snapshot.forecast_intercept,
+        "break_even_period": snapshot.break_even_period,
+    }
+
+def _roi_event(previous: Optional[ROISnapshot], previous_period: Optional[int], previous_alerts: List[Dict],
+               snapshot: ROISnapshot, current_period: int, alerts: List[Dict],
+               rows_unchanged: bool) -> Optional[str]:
+    """
+    Builds the SSE message taking a client from the previous snapshot to
+    this one: a full "snapshot" event when earlier rows may have changed,
+    otherwise a "delta" with only what changed, or None if nothing did.
+    """
+    if previous is None or not rows_unchanged or snapshot.visible_periods < previous.visible_periods:
+        return _sse("snapshot", {
+            "results": snapshot.rows(),
+            "alerts": alerts,
+            "forecast": _forecast_payload(snapshot),
+            "current_period": current_period,
+        })
+    delta: Dict = {}
+    if snapshot.visible_periods > previous.visible_periods:
+        delta["rows"] = snapshot.rows(previous.visible_periods + 1)
+    if _forecast_payload(snapshot) != _forecast_payload(previous):
+        delta["forecast"] = _forecast_payload(snapshot)
+    if alerts != previous_alerts:
+        delta["alerts"] = alerts
+    if not delta and current_period == previous_period:
+        return None
+    delta["current_period"] = current_period
+    return _sse("delta", delta)
+
+@router.get("/roi/stream")
+async def stream_roi(request: Request, tenant_id: str = Depends(current_tenant_id)):
+    """
+    Server-Sent Events feed of the ROI view. Sends one "snapshot" event with
+    the full /roi payload plus the forecast line, then a "delta" event after
+    each change carrying only new result rows, the updated forecast
+    coefficients (forecast_i = intercept + slope * i for every row i) and
+    the alerts if they changed. A new "snapshot" replaces everything when
+    periods are deleted or the period counter is reset.
+    """
+    await get_tenant(tenant_id)
+
+    async def events():
+        previous, previous_period, previous_alerts, previous_engine = None, None, [], None
+        while not await request.is_disconnected():
+            tenant = await registry.fetch(tenant_id)
+            # Grab the event before reading state so no change can slip
+            # between building this message and starting to wait
+            changed = tenant.changed
+            engine = tenant.engine
+            state, current_period, alerts = await _current_alerts(tenant)
+            snapshot = await run_compute(engine.snapshot, current_period, state=state)
+            rows_unchanged = (previous is not None and engine is previous_engine
+                              and snapshot.epoch == previous.epoch)
+            event = await run_compute(_roi_event, previous, previous_period, previous_alerts,
+                                      snapshot, current_period, alerts, rows_unchanged)
+            if event is not None:
+                yield event
+            previous, previous_period, previous_alerts, previous_engine = snapshot, current_period, alerts, engine
+            try:
+                await asyncio.wait_for(changed.wait(), STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+            if tenant.evicted:
+                # Let go of the evicted engine and rebuild the tenant only once
+                # it changes; reloading right away would evict the next tenant
+                # and wake its watchers in turn whenever watched tenants
+                # exceed the memory budget
+                next_change = tenant.next_change
+                previous = previous_engine = tenant = engine = state = snapshot = None
+                while not next_change.is_set():
+                    if await request.is_disconnected():
+                        return
+                    try:
+                        await asyncio.wait_for(next_change.wait(), STREAM_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+MAX_SCENARIOS = 100_000  # Parameter combinations per sweep
+MAX_CURVE_CELLS = 2_000_000  # Scenario x period values returned with include_curves
+
+class ScenarioRequest(BaseModel):
+    subscription_costs: Optional[List[float]] = None
+    ach_costs_per_transaction: Optional[List[float]] = None
+    target_periods: Optional[List[int]] = None
+    cc_rates: Optional[List[float]] = None
+    conv_fees: Optional[List[float]] = None
+    include_curves: bool = False
+    current_period: Optional[int] = None  # Defaults to all periods
+
+@router.post("/roi/scenarios")
+async def roi_scenarios(scenario_request: ScenarioRequest, tenant_id: str = Depends(current_tenant_id)):
+    """
+    What-if sweep: ROI and break-even period for every combination of the
+    given parameter grids. Omitted grids keep the engine's values. Results
+    are returned column-wise, one list entry per scenario.
+    """
+    tenant = await get_tenant(tenant_id)
+    grids = [scenario_request.subscription_costs, scenario_request.ach_costs_per_transaction,
+             scenario_request.target_periods, scenario_request.cc_rates, scenario_request.conv_fees]
+    count = 1
+    for grid in grids:
+        if grid is not None:
+            if not grid:
+                raise HTTPException(status_code=400, detail="Parameter grids must not be empty")
+            count *= len(grid)
+    if count > MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Sweep has {count} scenarios; the limit is {MAX_SCENARIOS}")
+    state = tenant.engine.state
+    periods = len(range(state.periods)[:scenario_request.current_period])
+    if scenario_request.include_curves and count * periods > MAX_CURVE_CELLS:
+        raise HTTPException(status_code=400,
+                            detail=f"Curves for {count} scenarios x {periods} periods exceed {MAX_CURVE_CELLS} values")
+    try:
+        result = await run_compute(
+            tenant.engine.sweep_scenarios,
+            current_period=scenario_request.current_period,
+            subscription_costs=scenario_request.subscription_costs,
+            ach_costs_per_transaction=scenario_request.ach_costs_per_transaction,
+            target_periods=scenario_request.target_periods,
+            cc_rates=scenario_request.cc_rates,
+            conv_fees=scenario_request.conv_fees,
+            include_curves=scenario_request.include_curves,
+            state=state,
+        )
+        return {"count": count, "periods": periods, "scenarios": await run_compute(scenario_rows, result)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_FORECAST_PATHS = 1_000_000
+MAX_FORECAST_CELLS = 100_000_000  # Simulated paths x horizon periods
+
+@router.get("/roi/forecast")
+async def roi_forecast(tenant_id: str = Depends(current_tenant_id), paths: int = DEFAULT_PATHS, horizon: Optional[int] = None):
+    """
+    Monte Carlo break-even forecast: the probability of reaching ROI within
+    the target, and P10/P50/P90 periods until break-even, from simulated
+    paths that resample the observed period savings. Memoized per data
+    version, so repeated loads do not re-simulate.
+    """
+    tenant = await get_tenant(tenant_id)
+    horizon = tenant.engine.BREAK_EVEN_HORIZON if horizon is None else horizon
+    if not 0 < paths <= MAX_FORECAST_PATHS or horizon <= 0:
+        raise HTTPException(status_code=400, detail=f"paths must be 1-{MAX_FORECAST_PATHS} and horizon positive")
+    if paths * horizon > MAX_FORECAST_CELLS:
+        raise HTTPException(status_code=400,
+                            detail=f"{paths} paths x {horizon} periods exceed {MAX_FORECAST_CELLS} simulated values")
+    engine, state, current_period = tenant.engine, tenant.engine.state, tenant.current_period
     try:
-        roi_data = roi_engine.calculate_roi(current_period)
-        alerts = roi_engine.get_alerts(current_period)
+        forecast = await run_compute(engine.forecast_break_even, current_period, paths, horizon, state=state)
         return {
-            "results": roi_data,
-            "alerts": alerts,
-            "current_period": current_period
+            "forecast": forecast.to_dict() if forecast is not None else None,
+            "alerts": engine.forecast_alerts(forecast),
+            "current_period": current_period,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/next-period")
-async def load_next_period():
+@router.get("/alerts")
+async def list_alerts(tenant_id: str = Depends(current_tenant_id), since: int = 0):
+    """
+    Alert transitions ("fired" or "resolved", numbered by seq) after the
+    given seq, oldest first, along with the alerts active now. Polling with
+    the returned last_seq yields each transition once; truncated is true
+    when some transitions after since were dropped from the bounded history.
+    """
+    if since < 0:
+        raise HTTPException(status_code=400, detail="since must not be negative")
+    tenant = await get_tenant(tenant_id)
+    try:
+        _, current_period, active = await _current_alerts(tenant)
+        tracker = tenant.engine.alert_tracker
+        events, truncated = tracker.events(since)
+        return {
+            "events": events,
+            "active": active,
+            "last_seq": events[-1]["seq"] if events else tracker.last_seq,
+            "truncated": truncated,
+            "current_period": current_period,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/next-period")
+async def load_next_period(tenant_id: str = Depends(current_tenant_id)):
     """Load the next period of data"""
-    global current_period
+    writing = writing_tenant(tenant_id)
     try:
-        if current_period < len(roi_engine.periods):
-            current_period += 1
-            return {"message": f"Advanced to period {current_period}", "current_period": current_period}
-        else:
-            return {"message": "All periods loaded", "current_period": current_period}
+        async with writing as tenant:
+            if tenant.current_period < tenant.engine.period_count:
+                tenant.current_period += 1
+                _notify_changed(tenant)
+                return {"message": f"Advanced to period {tenant.current_period}", "current_period": tenant.current_period}
+            else:
+                return {"message": "All periods loaded", "current_period": tenant.current_period}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/reset-periods")
-async def reset_periods():
+@router.post("/reset-periods")
+async def reset_periods(tenant_id: str = Depends(current_tenant_id)):
     """Reset the current period counter"""
-    global current_period
+    writing = writing_tenant(tenant_id)
     try:
-        current_period = 0
-        return {"message": "Period counter reset", "current_period": current_period}
+        async with writing as tenant:
+            tenant.current_period = 0
+            _notify_changed(tenant)
+        return {"message": "Period counter reset", "current_period": tenant.current_period}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Router-level dependencies run before the routes' own, so each mount pins
+# the tenant before current_tenant_id reads it
+app.include_router(router, dependencies=[Depends(_default_tenant)])
+app.include_router(router, prefix="/tenants/{tenant_id}", dependencies=[Depends(_path_tenant)])
+
+@app.on_event("shutdown")
+def close_registry():
+    """Flush every tenant's period log before the process exits"""
+    compute_pool.shutdown()
+    registry.close()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
\ No newline at end of file
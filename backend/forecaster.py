@@ -0,0 +1,105 @@
+from typing import Optional, Tuple
+import numpy as np
+from period_store import GrowableArray
+
+
+class StreamingForecaster:
+    """
+    Ordinary least-squares line y = intercept + slope * x over the points
+    (0, y0), (1, y1), ... kept as running prefix sums, so the fit for any
+    prefix of the series is available in constant time.
+
+    x is always the point index, so n, Σx and Σx² are closed-form in the
+    number of points; only Σy and Σxy are accumulated as points arrive.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self._sum_y) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self._sum_y.nbytes + self._sum_xy.nbytes
+
+    def append(self, y: float):
+        x = len(self)
+        self._sum_y.append(self._sum_y.last() + y)
+        self._sum_xy.append(self._sum_xy.last() + x * y)
+
+    def extend(self, ys: np.ndarray):
+        """Appends several points at once; equivalent to repeated append()."""
+        ys = np.asarray(ys, dtype=float)
+        x = np.arange(len(self), len(self) + len(ys), dtype=float)
+        # Seed the cumulative sums with the running totals so they accumulate
+        # in the same order as repeated append() calls
+        self._sum_y.extend(np.cumsum(np.concatenate(([self._sum_y.last()], ys)))[1:])
+        self._sum_xy.extend(np.cumsum(np.concatenate(([self._sum_xy.last()], x * ys)))[1:])
+
+    def frozen(self) -> "StreamingForecaster":
+        """An O(1) copy over the points appended so far; later appends do not affect it."""
+        copy = StreamingForecaster.__new__(StreamingForecaster)
+        copy._sum_y = self._sum_y.frozen()
+        copy._sum_xy = self._sum_xy.frozen()
+        return copy
+
+    def reset(self):
+        # _sum_y[n] / _sum_xy[n] hold the sums over the first n points
+        self._sum_y = GrowableArray(np.float64)
+        self._sum_xy = GrowableArray(np.float64)
+        self._sum_y.append(0.0)
+        self._sum_xy.append(0.0)
+
+    def fit(self, n_points: int = None) -> Optional[Tuple[float, float]]:
+        """
+        Returns (slope, intercept) for the first n_points points (all points
+        by default), or None when fewer than two points are available.
+        """
+        n = len(self) if n_points is None else n_points
+        if n < 2 or n > len(self):
+            return None
+
+        sum_x = n * (n - 1) / 2
+        mean_x = sum_x / n
+        mean_y = self._sum_y.view()[n] / n
+        # Centered sums: Σ(x - x̄)² is exactly n(n² - 1) / 12 for x = 0..n-1
+        s_xx = n * (n * n - 1) / 12
+        s_xy = self._sum_xy.view()[n] - sum_x * mean_y
+
+        slope = s_xy / s_xx
+        intercept = mean_y - slope * mean_x
+        return slope, intercept
+
+    def predict(self, n_points: int = None) -> Optional[np.ndarray]:
+        """Fitted values for x = 0..n_points-1, or None if no fit is possible."""
+        n = len(self) if n_points is None else n_points
+        coefficients = self.fit(n)
+        if coefficients is None:
+            return None
+        slope, intercept = coefficients
+        return intercept + slope * np.arange(n, dtype=float)
+
+    def project(self, periods_ahead: int, n_points: int = None) -> Optional[np.ndarray]:
+        """Forecasts for the periods_ahead points following the first n_points."""
+        n = len(self) if n_points is None else n_points
+        coefficients = self.fit(n)
+        if coefficients is None:
+            return None
+        slope, intercept = coefficients
+        return intercept + slope * np.arange(n, n + periods_ahead, dtype=float)
+
+    def break_even_period(self, n_points: int = None) -> Optional[int]:
+        """
+        First x at which the fitted line reaches zero, or None when the line
+        never does (no fit, or a flat/decreasing trend that starts below zero).
+        """
+        coefficients = self.fit(n_points)
+        if coefficients is None:
+            return None
+        slope, intercept = coefficients
+        if intercept >= 0:
+            return 0
+        if slope <= 0:
+            return None
+        return int(np.ceil(-intercept / slope))
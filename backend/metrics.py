@@ -0,0 +1,296 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from bisect import bisect_left
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cached lookups (~10µs) through full recomputes of large tenants
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricRegistry:
+    """The metrics rendered on /metrics, in registration order."""
+
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric"):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricRegistry()
+
+class Metric:
+    TYPE = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[MetricRegistry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str):
+        """The child metric for one combination of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        # Unlabelled metrics use the child with no label values
+        return self.labels()
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Counter(Metric):
+    """A monotonically increasing total."""
+    TYPE = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+class Gauge(Metric):
+    """
+    A value that can go up and down. With function, the gauge is computed on
+    every scrape instead: function returns the value, or a dict mapping
+    label-value tuples to values for a labelled gauge.
+    """
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[MetricRegistry] = REGISTRY,
+                 function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def samples(self) -> Iterator[str]:
+        if self.function is None:
+            values = {key: child.value for key, child in list(self._children.items())}
+        else:
+            values = self.function()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "_HistogramValues"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class _HistogramValues:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Non-cumulative counts; the last slot is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager that observes the time spent inside it, in seconds."""
+        return _Timer(self)
+
+class Histogram(Metric):
+    """Counts of observations in fixed buckets, plus their sum."""
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[MetricRegistry] = REGISTRY, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValues:
+        return _HistogramValues(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+STAGE_SECONDS = Histogram(
+    "roi_stage_duration_seconds",
+    "Time spent in each stage of computing and serving ROI data",
+    ["stage"],
+)
+REQUESTS = Counter("roi_http_requests", "HTTP requests served", ["method", "route", "status"])
+REQUEST_SECONDS = Histogram("roi_http_request_duration_seconds",
+                            "Time from receiving a request to sending the end of its response",
+                            ["method", "route"])
+IN_FLIGHT = Gauge("roi_http_requests_in_flight", "HTTP requests currently being served")
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing every HTTP request by method, route
+    template and status. Durations run until the last body chunk is sent, so
+    streaming responses are timed in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            # The router records the matched route in the scope; label by its
+            # template so per-tenant paths do not each become a series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.labels(scope["method"], route, status).inc()
+            REQUEST_SECONDS.labels(scope["method"], route).observe(elapsed)
+
+class SlowCallProfiler:
+    """
+    Profiles a random sample_rate fraction of calls made through call()
+    under cProfile (one at a time), and logs the profile of any that take
+    longer than slow_seconds as a warning. cProfile only sees the thread it
+    is enabled on, so call() must run on the thread doing the work, e.g.
+    inside a worker pool task rather than around the await for it.
+    """
+
+    PROFILE_LINES = 25  # Functions listed per logged profile
+
+    def __init__(self, slow_seconds: float, sample_rate: float = 0.01):
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+        self._profiling = threading.Lock()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if random.random() >= self.sample_rate or not self._profiling.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._profiling.release()
+            if elapsed >= self.slow_seconds:
+                self._log_profile(profiler, fn, elapsed)
+
+    def _log_profile(self, profiler: cProfile.Profile, fn: Callable, elapsed: float):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(self.PROFILE_LINES)
+        name = getattr(fn, "__qualname__", None) or repr(fn)
+        logger.warning("Slow call %s took %.1fms; profile:\n%s", name, elapsed * 1000, output.getvalue())
@@ -0,0 +1,93 @@
+from typing import Dict, Optional
+from dataclasses import asdict, dataclass
+import numpy as np
+
+DEFAULT_PATHS = 100_000
+# Path x period draws generated per step, to bound peak memory
+BLOCK_CELLS = 4_000_000
+TIME_BLOCK = 16  # Periods simulated per step of the break-even search
+
+@dataclass(frozen=True)
+class BreakEvenForecast:
+    """
+    Distribution of the number of periods until ROI reaches zero, counted
+    from the last observed period as in ROIEngine.analyze_roi_trajectory
+    (0 when break-even is already reached). Percentiles beyond the
+    simulated horizon are None.
+    """
+    paths: int
+    horizon: int
+    target_periods: int
+    observed_periods: int
+    mean_period_savings: float
+    std_period_savings: float
+    probability_within_target: float
+    probability_within_horizon: float
+    p10: Optional[int]
+    p50: Optional[int]
+    p90: Optional[int]
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+def simulate_periods_to_roi(period_savings: np.ndarray, current_roi: float, horizon: int,
+                            paths: int = DEFAULT_PATHS, seed: int = 0) -> np.ndarray:
+    """
+    Bootstraps future paths by drawing each future period's savings from
+    the observed period_savings with replacement, and returns the number of
+    periods until each path's ROI reaches zero; horizon + 1 where it does not
+    within horizon periods.
+
+    Paths are simulated together in blocks of TIME_BLOCK periods, and a path
+    stops being simulated once it has broken even.
+    """
+    period_savings = np.asarray(period_savings, dtype=np.float64)
+    result = np.full(paths, horizon + 1, dtype=np.int64)
+    if current_roi >= 0:
+        result[:] = 0
+        return result
+    if not len(period_savings):
+        return result
+
+    rng = np.random.default_rng(seed)
+    running = np.full(paths, float(current_roi))
+    pending = np.arange(paths)
+    for t0 in range(0, horizon, TIME_BLOCK):
+        width = min(TIME_BLOCK, horizon - t0)
+        step = max(1, BLOCK_CELLS // width)
+        for lo in range(0, len(pending), step):
+            rows = pending[lo:lo + step]
+            draws = period_savings[rng.integers(0, len(period_savings), size=(len(rows), width))]
+            roi = np.cumsum(draws, axis=1)
+            roi += running[rows, None]
+            reached = roi >= 0
+            first = reached.argmax(axis=1)
+            hit = reached[np.arange(len(rows)), first]
+            result[rows[hit]] = t0 + first[hit] + 1
+            running[rows] = roi[:, -1]
+        pending = pending[result[pending] > horizon]
+        if not len(pending):
+            break
+    return result
+
+def forecast_break_even(period_savings: np.ndarray, current_roi: float, target_periods: int,
+                        horizon: int, paths: int = DEFAULT_PATHS, seed: int = 0) -> BreakEvenForecast:
+    """Summarizes simulate_periods_to_roi as break-even probabilities and P10/P50/P90."""
+    period_savings = np.asarray(period_savings, dtype=np.float64)
+    periods_to_roi = simulate_periods_to_roi(period_savings, current_roi, horizon, paths, seed)
+    percentiles = np.percentile(periods_to_roi, [10, 50, 90], method="inverted_cdf").astype(np.int64).tolist()
+    p10, p50, p90 = (p if p <= horizon else None for p in percentiles)
+    return BreakEvenForecast(
+        paths=paths,
+        horizon=horizon,
+        target_periods=target_periods,
+        observed_periods=len(period_savings),
+        mean_period_savings=float(period_savings.mean()) if len(period_savings) else 0.0,
+        std_period_savings=float(period_savings.std()) if len(period_savings) else 0.0,
+        # Paths not reaching ROI within horizon are unknown; count them as missing the target
+        probability_within_target=float(np.mean(periods_to_roi <= min(target_periods, horizon))),
+        probability_within_horizon=float(np.mean(periods_to_roi <= horizon)),
+        p10=p10,
+        p50=p50,
+        p90=p90,
+    )
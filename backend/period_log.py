@@ -0,0 +1,350 @@
+from typing import Dict, List, Tuple
+import fcntl
+import glob
+import os
+import threading
+import numpy as np
+from period_store import PeriodStore
+
+MAGIC = b"ROIPLOG2"
+LEGACY_MAGIC = b"ROIPLOG1"  # Labels inline in a fixed 47-byte field; migrated on open
+# Magic, record size and labels file generation, 8 bytes each
+HEADER_SIZE = 24
+LEGACY_HEADER_SIZE = 16
+
+KIND_PERIOD = 0
+KIND_CLEAR = 1  # Tombstone: every earlier record is dead
+
+# Fixed-width little-endian record, 61 bytes. Labels are variable-length
+# UTF-8 kept in a side file; each record holds its label's byte range there.
+RECORD_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("label_offset", "<u8"),
+    ("label_length", "<u4"),
+    ("cc_volume", "<f8"),
+    ("cc_count", "<i8"),
+    ("ach_volume", "<f8"),
+    ("ach_count", "<i8"),
+    ("cc_rate", "<f8"),
+    ("conv_fee", "<f8"),
+])
+LEGACY_RECORD_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("label", "S47"),
+    ("cc_volume", "<f8"),
+    ("cc_count", "<i8"),
+    ("ach_volume", "<f8"),
+    ("ach_count", "<i8"),
+    ("cc_rate", "<f8"),
+    ("conv_fee", "<f8"),
+])
+
+def labels_path(path: str, generation: int) -> str:
+    return f"{path}.labels.{generation}"
+
+def _header(generation: int) -> bytes:
+    return MAGIC + np.array([RECORD_DTYPE.itemsize, generation], dtype="<u8").tobytes()
+
+def _read_header(path: str) -> Tuple[np.dtype, int, int]:
+    """The record dtype, header size and labels file generation of a period log."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:8] == MAGIC and len(header) == HEADER_SIZE:
+        record_size, generation = np.frombuffer(header[8:], "<u8").tolist()
+        if record_size == RECORD_DTYPE.itemsize:
+            return RECORD_DTYPE, HEADER_SIZE, generation
+    if header[:8] == LEGACY_MAGIC and np.frombuffer(header[8:16], "<u8")[0] == LEGACY_RECORD_DTYPE.itemsize:
+        return LEGACY_RECORD_DTYPE, LEGACY_HEADER_SIZE, 0
+    raise ValueError(f"{path} is not a period log")
+
+def _live(records: np.ndarray) -> np.ndarray:
+    clears = np.flatnonzero(records["kind"] == KIND_CLEAR)
+    return records[clears[-1] + 1:] if len(clears) else records
+
+def read_live_records(path: str) -> np.ndarray:
+    """
+    Memory-maps a period log read-only and returns its live records (those
+    after the last tombstone). Never modifies the file, so it is safe to use
+    on a log that a running service has open. Labels are not included; see
+    PeriodLog.read for those.
+    """
+    dtype, header_size, _ = _read_header(path)
+    # Ignore a partially written trailing record
+    count = (os.path.getsize(path) - header_size) // dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return _live(np.memmap(path, dtype=dtype, mode="r", offset=header_size, shape=(count,)))
+
+def _lock_exclusive(path: str):
+    """
+    Opens the lock file of the log at path and locks it, failing at once if
+    another process holds it. A separate file, since compaction replaces the log.
+    """
+    lock_file = open(path + ".lock", "a+b")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise RuntimeError(f"{path} is already open in another process") from None
+    return lock_file
+
+def _build_records(labels: List[bytes], columns: Dict[str, np.ndarray], base_offset: int) -> Tuple[np.ndarray, bytes]:
+    """Period records for UTF-8 labels stored from base_offset on, and the label bytes to store."""
+    records = np.zeros(len(labels), dtype=RECORD_DTYPE)
+    lengths = np.fromiter(map(len, labels), dtype=np.int64, count=len(labels))
+    records["kind"] = KIND_PERIOD
+    records["label_offset"] = base_offset + np.cumsum(lengths) - lengths
+    records["label_length"] = lengths
+    for name in PeriodStore.COLUMNS:
+        records[name] = columns[name]
+    return records, b"".join(labels)
+
+class PeriodLog:
+    """
+    Append-only binary log of periods, one fixed-width record per period,
+    with the period labels in a side file. Labels are written before the
+    records that point at them, so after a crash any record whose label is
+    missing is part of the torn tail and is dropped on open.
+
+    Clearing appends a tombstone instead of rewriting the file; compact()
+    rewrites the log without dead records once they outnumber live ones.
+    Compaction writes a new labels file under the next generation and
+    switches to it by atomically replacing the log, whose header names it.
+
+    fsync is batched: appends are flushed to the OS immediately and forced
+    to disk once sync_every records are pending, by a background timer at
+    most sync_interval seconds after the first unsynced append, and on
+    sync()/close(). A crash of the machine loses at most that window; a
+    crash of the process alone loses nothing.
+
+    Only one PeriodLog may have a log open at a time, since each tracks the
+    end of the labels file itself; opening one that is open elsewhere (in
+    another process sharing the data directory, say) raises RuntimeError.
+    """
+
+    def __init__(self, path: str, sync_every: int = 256, sync_interval: float = 1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # Writers are serialized by the engine, but the sync timer is not
+        self._lock = threading.RLock()
+        self._timer = None
+        self._unsynced = 0
+        self._lock_file = _lock_exclusive(path)
+        try:
+            self._open()
+            self._live, self._dead = self._count_records()
+            if self._dead:
+                self.compact()
+        except Exception:
+            self._lock_file.close()
+            raise
+
+    def _open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < LEGACY_HEADER_SIZE:
+            open(labels_path(self.path, 0), "wb").close()
+            with open(self.path, "wb") as f:
+                f.write(_header(0))
+                f.flush()
+                os.fsync(f.fileno())
+        dtype, _, generation = _read_header(self.path)
+        if dtype is LEGACY_RECORD_DTYPE:
+            self._migrate_legacy()
+            dtype, _, generation = _read_header(self.path)
+        self._generation = generation
+        self._remove_stale_labels()
+        self._recover()
+        self._file = open(self.path, "r+b")
+        self._file.seek(0, os.SEEK_END)
+        self._labels_file = open(labels_path(self.path, generation), "r+b")
+        self._labels_file.seek(0, os.SEEK_END)
+        self._labels_size = self._labels_file.tell()
+
+    def _remove_stale_labels(self):
+        """Deletes labels files of other generations, left behind by a crash during compaction."""
+        current = labels_path(self.path, self._generation)
+        for name in glob.glob(glob.escape(self.path) + ".labels.*"):
+            if name != current:
+                os.remove(name)
+
+    def _recover(self):
+        """Drops a partially written trailing record and any records whose labels never reached disk."""
+        labels_size = os.path.getsize(labels_path(self.path, self._generation))
+        size = os.path.getsize(self.path)
+        count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        keep = count
+        if count:
+            records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+            ends = records["label_offset"] + records["label_length"]
+            missing = np.flatnonzero((records["kind"] == KIND_PERIOD) & (ends > labels_size))
+            if len(missing):
+                keep = int(missing[0])
+            del records
+        whole = HEADER_SIZE + keep * RECORD_DTYPE.itemsize
+        if whole != size:
+            with open(self.path, "r+b") as f:
+                f.truncate(whole)
+
+    def _migrate_legacy(self):
+        """Rewrites a log in the legacy inline-label format in the current format."""
+        live = np.array(read_live_records(self.path))
+        labels = [raw.decode("utf-8") for raw in live["label"].tolist()]
+        self._generation = 0
+        self._rewrite(labels, {name: live[name] for name in PeriodStore.COLUMNS})
+
+    def _live_records(self) -> np.ndarray:
+        return read_live_records(self.path)
+
+    def _count_records(self) -> Tuple[int, int]:
+        total = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        live = len(self._live_records())
+        return live, total - live
+
+    def __len__(self) -> int:
+        """Number of live periods in the log."""
+        return self._live
+
+    def _write(self, records: np.ndarray, label_bytes: bytes = b""):
+        with self._lock:
+            if label_bytes:
+                self._labels_file.write(label_bytes)
+                self._labels_file.flush()
+                self._labels_size += len(label_bytes)
+            self._file.write(records.tobytes())
+            self._file.flush()
+            self._unsynced += len(records)
+            if self._unsynced >= self.sync_every:
+                self.sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self._sync_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_pending(self):
+        with self._lock:
+            self._timer = None
+            if self._unsynced and not self._file.closed:
+                self.sync()
+
+    def _period_records(self, labels: List[str], columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, bytes]:
+        return _build_records([label.encode("utf-8") for label in labels], columns, self._labels_size)
+
+    def append_columns(self, labels: List[str], columns: Dict[str, np.ndarray]):
+        """Appends one record per label."""
+        with self._lock:
+            records, label_bytes = self._period_records(labels, columns)
+            self._write(records, label_bytes)
+            self._live += len(records)
+
+    def append(self, label: str, values: Dict[str, float]):
+        raw = label.encode("utf-8")
+        with self._lock:
+            # Built from one tuple; much cheaper than _build_records for a single row
+            record = (KIND_PERIOD, self._labels_size, len(raw), *(values[name] for name in PeriodStore.COLUMNS))
+            self._write(np.array([record], dtype=RECORD_DTYPE), raw)
+            self._live += 1
+
+    def append_clear(self):
+        """Marks every period logged so far as deleted."""
+        with self._lock:
+            records = np.zeros(1, dtype=RECORD_DTYPE)
+            records["kind"] = KIND_CLEAR
+            self._write(records)
+            self._dead += self._live + 1
+            self._live = 0
+            if self._dead > self._live:
+                self.compact()
+
+    def replace_columns(self, labels: List[str], columns: Dict[str, np.ndarray]):
+        """
+        Replaces every logged period with the given ones: a tombstone and the
+        new records, written together so the log never holds only one of them.
+        """
+        with self._lock:
+            records, label_bytes = self._period_records(labels, columns)
+            tombstone = np.zeros(1, dtype=RECORD_DTYPE)
+            tombstone["kind"] = KIND_CLEAR
+            self._write(np.concatenate((tombstone, records)), label_bytes)
+            self._dead += self._live + 1
+            self._live = len(records)
+            if self._dead > self._live:
+                self.compact()
+
+    def _read_labels(self, records: np.ndarray) -> List[str]:
+        if not len(records):
+            return []
+        offsets = records["label_offset"].astype(np.int64)
+        lengths = records["label_length"].astype(np.int64)
+        start = int(offsets.min())
+        with open(labels_path(self.path, self._generation), "rb") as f:
+            f.seek(start)
+            data = f.read(int((offsets + lengths).max()) - start)
+        return [data[o:o + n].decode("utf-8") for o, n in zip((offsets - start).tolist(), lengths.tolist())]
+
+    def read(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Returns the live periods as labels and one array per PeriodStore
+        column. The columns are read straight from a memory map of the log.
+        """
+        with self._lock:
+            self._file.flush()
+            self._labels_file.flush()
+            records = self._live_records()
+            return self._read_labels(records), {name: records[name] for name in PeriodStore.COLUMNS}
+
+    def _rewrite(self, labels: List[str], columns: Dict[str, np.ndarray]):
+        """
+        Writes the given periods as the whole log, under the next labels
+        file generation. Replacing the log is the commit point; until then
+        the old log and labels file stay intact.
+        """
+        generation = self._generation + 1
+        records, label_bytes = _build_records([label.encode("utf-8") for label in labels], columns, 0)
+        with open(labels_path(self.path, generation), "wb") as f:
+            f.write(label_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path = self.path + ".compact"
+        with open(tmp_path, "wb") as f:
+            f.write(_header(generation))
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._generation = generation
+        self._remove_stale_labels()
+
+    def compact(self):
+        """Rewrites the log with only its live records."""
+        with self._lock:
+            labels, columns = self.read()
+            columns = {name: np.array(column) for name, column in columns.items()}
+            self._file.close()
+            self._labels_file.close()
+            self._rewrite(labels, columns)
+            self._file = open(self.path, "r+b")
+            self._file.seek(0, os.SEEK_END)
+            self._labels_file = open(labels_path(self.path, self._generation), "r+b")
+            self._labels_file.seek(0, os.SEEK_END)
+            self._labels_size = self._labels_file.tell()
+            self._live, self._dead = len(labels), 0
+            self._unsynced = 0
+
+    def sync(self):
+        with self._lock:
+            self._labels_file.flush()
+            os.fsync(self._labels_file.fileno())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._file.closed:
+                self.sync()
+                self._file.close()
+                self._labels_file.close()
+                self._lock_file.close()
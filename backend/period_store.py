@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, Tuple
+import sys
+import numpy as np
+
+
+class GrowableArray:
+    """
+    Contiguous 1-D NumPy buffer with amortized O(1) appends.
+
+    Growing allocates a new buffer, so views returned by view() stay valid
+    and unchanged while later rows are appended.
+    """
+
+    def __init__(self, dtype, capacity: int = 64):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def _reserve(self, size: int):
+        if size <= len(self._data):
+            return
+        capacity = max(size, 2 * len(self._data))
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values: np.ndarray):
+        values = np.asarray(values, dtype=self._data.dtype)
+        self._reserve(self._size + len(values))
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def last(self, default=0):
+        return self._data[self._size - 1] if self._size else default
+
+    def view(self, stop: int = None) -> np.ndarray:
+        stop = self._size if stop is None else min(stop, self._size)
+        return self._data[:stop]
+
+    def frozen(self) -> "GrowableArray":
+        """
+        An O(1) copy holding the current rows. It shares this array's buffer
+        but has no spare capacity, so appending to either never changes what
+        the other holds.
+        """
+        copy = GrowableArray.__new__(GrowableArray)
+        copy._data = self._data[:self._size]
+        copy._size = self._size
+        return copy
+
+
+class PeriodStore:
+    """Columnar storage for transaction periods, one growable array per field."""
+
+    COLUMNS = {
+        "cc_volume": np.float64,
+        "cc_count": np.int64,
+        "ach_volume": np.float64,
+        "ach_count": np.int64,
+        "cc_rate": np.float64,
+        "conv_fee": np.float64,
+    }
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self._columns = {name: GrowableArray(dtype) for name, dtype in self.COLUMNS.items()}
+        self._label_bytes = 0  # Size of the label strings themselves
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store, label strings included."""
+        return sum(c.nbytes for c in self._columns.values()) + 8 * len(self.labels) + self._label_bytes
+
+    def append(self, label: str, values: Dict[str, float]):
+        row = [values[name] for name in self._columns]
+        for column, value in zip(self._columns.values(), row):
+            column.append(value)
+        self.labels.append(label)
+        self._label_bytes += sys.getsizeof(label)
+
+    @classmethod
+    def prepare(cls, labels: Iterable[str], columns: Dict[str, np.ndarray]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Converts rows given as one array per column to the store's dtypes,
+        raising ValueError unless every column has one value per label.
+        """
+        labels = list(labels)
+        arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in cls.COLUMNS.items()}
+        if any(a.ndim != 1 or len(a) != len(labels) for a in arrays.values()):
+            raise ValueError("All columns must have one value per period label")
+        return labels, arrays
+
+    def extend(self, labels: Iterable[str], columns: Dict[str, np.ndarray]):
+        """Appends several rows given as one array per column."""
+        labels, arrays = self.prepare(labels, columns)
+        for name, column in self._columns.items():
+            column.extend(arrays[name])
+        self.labels.extend(labels)
+        self._label_bytes += sum(map(sys.getsizeof, labels))
+
+    def column(self, name: str, stop: int = None) -> np.ndarray:
+        return self._columns[name].view(stop)
+
+    def columns(self, stop: int = None) -> Dict[str, np.ndarray]:
+        return {name: column.view(stop) for name, column in self._columns.items()}
@@ -0,0 +1,180 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+import numpy as np
+from period_store import PeriodStore
+from roi_engine import ROIEngine, savings_breakdown
+
+# Column order of the shared (len(COLUMNS), total_periods) input block
+COLUMNS = tuple(PeriodStore.COLUMNS)
+
+@dataclass
+class PortfolioSummary:
+    """
+    One row per tenant, stored column-wise. Break-even periods are 1-based
+    period numbers; -1 means not reached (or no projection possible).
+    """
+    tenant_ids: List[str]
+    periods: np.ndarray
+    roi: np.ndarray  # ROI after the last period
+    break_even_achieved: np.ndarray
+    break_even_period: np.ndarray  # First period with ROI >= 0
+    savings_rate: np.ndarray  # As in ROIEngine.analyze_roi_trajectory
+    periods_to_roi: np.ndarray  # As in ROIEngine.analyze_roi_trajectory
+    will_achieve_target: np.ndarray
+    forecast_break_even_period: np.ndarray  # From the linear ROI trend
+
+    FIELDS = ("periods", "roi", "break_even_achieved", "break_even_period", "savings_rate",
+              "periods_to_roi", "will_achieve_target", "forecast_break_even_period")
+
+    def rows(self) -> List[Dict]:
+        columns = {name: getattr(self, name).tolist() for name in self.FIELDS}
+        return [
+            {"tenant_id": tenant_id, **{name: columns[name][i] for name in self.FIELDS}}
+            for i, tenant_id in enumerate(self.tenant_ids)
+        ]
+
+def _summarize(data: np.ndarray, lengths: np.ndarray, subscription_cost: float,
+               ach_cost_per_transaction: float, target_periods: int) -> Dict[str, np.ndarray]:
+    """
+    Computes the summary fields for consecutive tenants whose periods are laid
+    out back to back in data (one row per column in COLUMNS). Every tenant
+    must have at least one period.
+    """
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ends = starts + lengths
+    columns = dict(zip(COLUMNS, data))
+    period_savings = savings_breakdown(columns, ach_cost_per_transaction)["period_savings"]
+
+    # Cumulative savings per tenant: a global running sum, rebased at each
+    # tenant's first period
+    running = np.cumsum(period_savings)
+    offsets = np.repeat(running[starts] - period_savings[starts], lengths)
+    roi = running - offsets - subscription_cost
+
+    last_roi = roi[ends - 1]
+    savings_rate = (last_roi - roi[starts]) / lengths
+
+    # First period at or above break-even
+    local_index = np.arange(len(roi)) - np.repeat(starts, lengths)
+    reached = np.where(roi >= 0, local_index, np.iinfo(np.int64).max)
+    first_reached = np.minimum.reduceat(reached, starts)
+    break_even_period = np.where(first_reached < np.iinfo(np.int64).max, first_reached + 1, -1)
+
+    # Trajectory projection, mirroring ROIEngine.analyze_roi_trajectory
+    with np.errstate(divide="ignore", invalid="ignore"):
+        projected = np.ceil(np.abs(last_roi) / savings_rate)
+    periods_to_roi = np.where(last_roi >= 0, 0, np.where(savings_rate > 0, projected, -1)).astype(np.int64)
+    will_achieve_target = (last_roi >= 0) | ((savings_rate > 0) & (periods_to_roi <= target_periods))
+
+    # Least-squares trend over (0, -subscription_cost), (1, roi_1), ..., as in
+    # StreamingForecaster, for tenants with at least two periods
+    n = lengths + 1.0
+    x = local_index + 1.0
+    sum_y = np.add.reduceat(roi, starts) - subscription_cost
+    sum_xy = np.add.reduceat(x * roi, starts)
+    sum_x = n * (n - 1) / 2
+    mean_y = sum_y / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (sum_xy - sum_x * mean_y) / (n * (n * n - 1) / 12)
+        intercept = mean_y - slope * sum_x / n
+        crossing = np.ceil(-intercept / slope)
+    forecast_break_even = np.where(
+        lengths < 2, -1,
+        np.where(intercept >= 0, 0, np.where(slope > 0, crossing, -1)),
+    ).astype(np.int64)
+
+    return {
+        "roi": last_roi,
+        "break_even_achieved": last_roi >= 0,
+        "break_even_period": break_even_period.astype(np.int64),
+        "savings_rate": savings_rate,
+        "periods_to_roi": periods_to_roi,
+        "will_achieve_target": will_achieve_target,
+        "forecast_break_even_period": forecast_break_even,
+    }
+
+def _summarize_shared(shm_name: str, shape: Tuple[int, int], begin: int, lengths: np.ndarray,
+                      subscription_cost: float, ach_cost_per_transaction: float,
+                      target_periods: int) -> Dict[str, np.ndarray]:
+    """Worker entry point: summarizes one run of tenants from shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[:, begin:begin + int(lengths.sum())]
+        summary = _summarize(data, lengths, subscription_cost, ach_cost_per_transaction, target_periods)
+        # Views into the buffer must be gone before it can be closed
+        del data
+        return summary
+    finally:
+        shm.close()
+
+def compute_portfolio(period_sets: Mapping[str, Mapping[str, Sequence[float]]],
+                      workers: int = 1,
+                      chunks_per_worker: int = 4,
+                      subscription_cost: float = ROIEngine.SUBSCRIPTION_COST,
+                      ach_cost_per_transaction: float = ROIEngine.ACH_COST_PER_TRANSACTION,
+                      target_periods: int = ROIEngine.TARGET_PERIODS_TO_ROI) -> PortfolioSummary:
+    """
+    Computes ROI, break-even status and projected periods-to-ROI for many
+    tenants at once. period_sets maps tenant IDs to one array per
+    PeriodStore column.
+
+    All tenants are concatenated into a single column block and computed with
+    segmented array operations. With workers > 1 the block is placed in
+    shared memory and runs of tenants are summarized in a process pool.
+    """
+    tenant_ids = list(period_sets)
+    lengths = np.array([len(period_sets[t]["cc_volume"]) for t in tenant_ids], dtype=np.int64)
+    total = int(lengths.sum())
+    result = {
+        "roi": np.full(len(tenant_ids), -float(subscription_cost)),
+        "break_even_achieved": np.zeros(len(tenant_ids), dtype=bool),
+        "break_even_period": np.full(len(tenant_ids), -1, dtype=np.int64),
+        "savings_rate": np.full(len(tenant_ids), np.nan),
+        "periods_to_roi": np.full(len(tenant_ids), -1, dtype=np.int64),
+        "will_achieve_target": np.zeros(len(tenant_ids), dtype=bool),
+        "forecast_break_even_period": np.full(len(tenant_ids), -1, dtype=np.int64),
+    }
+    # Tenants without periods keep the defaults above
+    active = np.flatnonzero(lengths)
+    if len(active) == 0:
+        return PortfolioSummary(tenant_ids, lengths, **result)
+
+    shm: Optional[shared_memory.SharedMemory] = None
+    if workers > 1:
+        shm = shared_memory.SharedMemory(create=True, size=len(COLUMNS) * total * 8)
+        data = np.ndarray((len(COLUMNS), total), dtype=np.float64, buffer=shm.buf)
+    else:
+        data = np.empty((len(COLUMNS), total), dtype=np.float64)
+    try:
+        for row, name in enumerate(COLUMNS):
+            data[row] = np.concatenate([np.asarray(period_sets[tenant_ids[i]][name], dtype=np.float64) for i in active])
+        active_lengths = lengths[active]
+        constants = (subscription_cost, ach_cost_per_transaction, target_periods)
+
+        if shm is None:
+            parts = [(active, _summarize(data, active_lengths, *constants))]
+        else:
+            # Split into runs of tenants with roughly equal period counts
+            bounds = np.concatenate(([0], np.cumsum(active_lengths)))
+            targets = np.linspace(0, total, workers * chunks_per_worker + 1)[1:-1]
+            cuts = np.unique(np.concatenate(([0], np.searchsorted(bounds, targets), [len(active)])))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    (active[lo:hi], pool.submit(_summarize_shared, shm.name, data.shape, int(bounds[lo]),
+                                                active_lengths[lo:hi], *constants))
+                    for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo
+                ]
+                parts = [(indices, future.result()) for indices, future in futures]
+
+        for indices, fields in parts:
+            for name, values in fields.items():
+                result[name][indices] = values
+    finally:
+        if shm is not None:
+            del data
+            shm.close()
+            shm.unlink()
+
+    return PortfolioSummary(tenant_ids, lengths, **result)
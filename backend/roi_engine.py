@@ -1,9 +1,27 @@
 from typing import List, Dict, Optional, Tuple
-import pandas as pd
+import threading
 import numpy as np
-from sklearn.linear_model import LinearRegression
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import count
+from alerts import AlertTracker
+from forecaster import StreamingForecaster
+from metrics import STAGE_SECONDS
+from montecarlo import DEFAULT_PATHS, BreakEvenForecast, forecast_break_even
+from period_log import PeriodLog
+from period_store import GrowableArray, PeriodStore
+from scenarios import sweep_scenarios
+from transactions import IngestResult, aggregate_transactions
+
+# Data versions are unique across every engine in the process, so a version
+# also tells apart a tenant's engine from one rebuilt after eviction
+_versions = count(1)
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """A view of array that raises on writes, for handing out published state."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
 
 @dataclass
 class TransactionPeriod:
@@ -15,35 +33,423 @@ class TransactionPeriod:
     cc_rate: float
     conv_fee: float
 
+def savings_breakdown(columns: Dict[str, np.ndarray], ach_cost_per_transaction: float) -> Dict[str, np.ndarray]:
+    """
+    Computes the per-period fee and savings figures for whole columns of
+    period data at once (plain scalars work as well, for a single period).
+    """
+    cc_volume = columns["cc_volume"]
+    ach_volume = columns["ach_volume"]
+    cc_rate = columns["cc_rate"] / 100
+    
+    # Calculate what it would cost if all volume was processed via credit cards
+    potential_cc_cost = (cc_volume + ach_volume) * cc_rate
+    
+    # Calculate actual costs for each payment method
+    actual_cc_cost = cc_volume * (columns["conv_fee"] / 100)  # Using convenience fee rate
+    ach_costs = columns["ach_count"] * ach_cost_per_transaction  # Fixed cost per ACH transaction
+    
+    # Calculate savings from each payment method
+    cc_fee_savings = (cc_volume * cc_rate) - actual_cc_cost
+    ach_savings = (ach_volume * cc_rate) - ach_costs
+    
+    return {
+        # Total period savings
+        "period_savings": cc_fee_savings + ach_savings,
+        "cc_fee_savings": cc_fee_savings,
+        "ach_costs": ach_costs,
+        "ach_savings": ach_savings,
+        "potential_cc_cost": potential_cc_cost,
+        "actual_cc_cost": actual_cc_cost,
+    }
+
+@dataclass(frozen=True)
+class ROISnapshot:
+    """
+    Immutable view of the ROI state for one (data version, current_period).
+    Computed once and shared by calculate_roi, analyze_roi_trajectory,
+    get_alerts and the API, so a single request sees one consistent result.
+
+    The arrays are read-only views over the first visible_periods rows of the
+    engine's columnar store; result rows are only materialized as dicts when
+    asked for through rows() or results, and are not kept, so a cached
+    snapshot costs little more than its roi and forecasts arrays.
+    """
+    version: int
+    epoch: int  # Changes whenever existing periods are removed or replaced
+    visible_periods: int
+    subscription_cost: float
+    ach_cost_per_transaction: float
+    labels: List[str]
+    columns: Dict[str, np.ndarray]
+    cumulative_savings: np.ndarray
+    roi: np.ndarray
+    forecasts: np.ndarray  # One per result row, Period 0 included
+    will_achieve_target: bool
+    periods_to_roi: Optional[int]
+    savings_rate: Optional[float]
+    # Alerts whose rules hold for this snapshot, without timestamps; see AlertTracker
+    alerts: Tuple[Dict, ...] = field(default=())
+    # Linear trend of the ROI series; None until there are two periods
+    forecast_slope: Optional[float] = None
+    forecast_intercept: Optional[float] = None
+    break_even_period: Optional[int] = None
+
+    @property
+    def trajectory(self) -> Tuple[bool, Optional[int], Optional[float]]:
+        return self.will_achieve_target, self.periods_to_roi, self.savings_rate
+
+    @property
+    def current_roi(self) -> float:
+        return float(self.roi[-1]) if self.visible_periods else -self.subscription_cost
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by this snapshot's own arrays; the rest are views of the engine's."""
+        return self.roi.nbytes + self.forecasts.nbytes
+
+    @property
+    def results(self) -> Tuple[Dict, ...]:
+        """Every result row. Built on each access; use rows() to build them in chunks."""
+        return tuple(self.rows())
+
+    def rows(self, start: int = 0, stop: int = None) -> List[Dict]:
+        """
+        Builds the result dicts for result rows [start, stop), where row 0 is
+        Period 0 and row i is the i-th visible period.
+        """
+        with STAGE_SECONDS.labels("result_rows").time():
+            return self._rows(start, stop)
+
+    def _rows(self, start: int, stop: Optional[int]) -> List[Dict]:
+        start, stop, _ = slice(start, stop).indices(self.visible_periods + 1)
+        if start >= stop:
+            return []
+        rows = []
+        if start == 0:
+            # Add period 0 with initial subscription cost
+            rows.append({
+                "period": "Period 0",
+                "roi": -self.subscription_cost,
+                "forecast": float(self.forecasts[0]),
+                "raw_numbers": {
+                    "subscription_cost": self.subscription_cost,
+                    "cumulative_savings": 0,
+                    "period_savings": 0,
+                    "cc_fee_savings": 0,
+                    "ach_costs": 0,
+                }
+            })
+            start = 1
+        
+        # Periods are offset by one from result rows because of Period 0
+        window = slice(start - 1, stop - 1)
+        breakdown = savings_breakdown({name: c[window] for name, c in self.columns.items()},
+                                      self.ach_cost_per_transaction)
+        breakdown = {name: values.tolist() for name, values in breakdown.items()}
+        cumulative_savings = self.cumulative_savings[window].tolist()
+        roi = self.roi[window].tolist()
+        forecasts = self.forecasts[start:stop].tolist()
+        for i, label in enumerate(self.labels[window]):
+            rows.append({
+                "period": label,
+                "roi": roi[i],
+                "forecast": forecasts[i],
+                "raw_numbers": {
+                    "subscription_cost": self.subscription_cost,
+                    "cumulative_savings": cumulative_savings[i],
+                    "period_savings": breakdown["period_savings"][i],
+                    "cc_fee_savings": breakdown["cc_fee_savings"][i],
+                    "ach_costs": breakdown["ach_costs"][i],
+                    "ach_savings": breakdown["ach_savings"][i],
+                    "potential_cc_cost": breakdown["potential_cc_cost"][i],
+                    "actual_cc_cost": breakdown["actual_cc_cost"][i]
+                }
+            })
+        return rows
+
+@dataclass(frozen=True)
+class EngineState:
+    """
+    Immutable published state of an ROIEngine: one data version of the
+    periods and running ROI state, as views that later writes never change.
+
+    Writers build the next state and publish it with a single reference
+    assignment, so readers that grab engine.state once compute against a
+    consistent version without taking locks.
+    """
+    version: int
+    epoch: int  # Changes whenever existing periods are removed or replaced
+    periods: int
+    labels: List[str]  # Append-only; only the first `periods` belong to this state
+    columns: Dict[str, np.ndarray]
+    cumulative_savings: np.ndarray
+    forecaster: StreamingForecaster  # Frozen; fit over the first periods + 1 points
+    # Snapshots computed from this state, by visible period count. Readers
+    # may race to fill it; both compute the same snapshot.
+    snapshots: Dict[int, ROISnapshot] = field(default_factory=dict, repr=False, compare=False)
+    # Monte Carlo forecasts, by (visible periods, paths, horizon, seed)
+    break_even_forecasts: Dict[Tuple[int, int, int, int], BreakEvenForecast] = field(
+        default_factory=dict, repr=False, compare=False)
+
 class ROIEngine:
     SUBSCRIPTION_COST = 170000  # Cost of platform subscription
     TARGET_PERIODS_TO_ROI = 24  # Expected to achieve ROI within 24 periods
     ACH_COST_PER_TRANSACTION = 0.25  # Fixed cost per ACH transaction
+    SNAPSHOT_CACHE_SIZE = 8  # Snapshots and break-even forecasts kept per data version
+    BREAK_EVEN_HORIZON = 240  # Future periods simulated by forecast_break_even
+    # Break-even probabilities within target that raise probabilistic alerts
+    LOW_BREAK_EVEN_PROBABILITY = 0.5
+    HIGH_BREAK_EVEN_PROBABILITY = 0.9
     
-    def __init__(self):
-        self.periods: List[TransactionPeriod] = []
+    def __init__(self, log: Optional[PeriodLog] = None):
+        # Serializes writers; readers only ever look at the published state
+        self._write_lock = threading.RLock()
+        self._epoch = 0
+        self._invalidate()
+        self._publish()
+        # Every change is written to the log before it is applied in memory
+        self.log = log
+        self.alert_tracker = AlertTracker()
+        # Latest forecast alert, so it keeps the time it fired at while its type holds
+        self._forecast_alert: Optional[Dict] = None
+
+    @classmethod
+    def from_log(cls, log: PeriodLog) -> "ROIEngine":
+        """Rebuilds an engine from the live periods of a period log."""
+        engine = cls()
+        labels, columns = log.read()
+        if labels:
+            engine.add_columns(labels, columns)
+        engine.log = log
+        return engine
+
+    @property
+    def state(self) -> EngineState:
+        """The current published state; it never changes once read."""
+        return self._state
+
+    @property
+    def version(self) -> int:
+        """Data version, bumped on every change; snapshots are only valid for one version."""
+        return self._state.version
+
+    @property
+    def epoch(self) -> int:
+        return self._state.epoch
+
+    def __len__(self) -> int:
+        return self._state.periods
+
+    @property
+    def period_count(self) -> int:
+        return self._state.periods
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the period data, running ROI state and cached snapshots."""
+        snapshots = sum(snapshot.nbytes for snapshot in list(self._state.snapshots.values()))
+        return self._store.nbytes + self._cumulative_savings.nbytes + self._forecaster.nbytes + snapshots
+
+    @property
+    def periods(self) -> List[TransactionPeriod]:
+        """
+        The stored periods as TransactionPeriod objects. This is a copy built
+        from the columnar store; use add_period/replace_periods to change data.
+        """
+        return [TransactionPeriod(**row) for row in self.get_periods()]
         
     def add_period(self, period: TransactionPeriod):
-        self.periods.append(period)
+        with self._write_lock:
+            if self.log is not None:
+                self.log.append(period.period, period.__dict__)
+            self._store.append(period.period, period.__dict__)
+            # savings_breakdown works on scalars too, which beats NumPy for one row
+            period_savings = savings_breakdown(period.__dict__, self.ACH_COST_PER_TRANSACTION)["period_savings"]
+            cumulative = self._cumulative_savings.last() + period_savings
+            self._cumulative_savings.append(cumulative)
+            self._forecaster.append(cumulative - self.SUBSCRIPTION_COST)
+            self._publish()
+
+    def add_periods(self, periods: List[TransactionPeriod]):
+        """Appends several periods as a single data change."""
+        self.add_columns(
+            [p.period for p in periods],
+            {name: [getattr(p, name) for p in periods] for name in PeriodStore.COLUMNS},
+        )
+
+    def add_columns(self, labels: List[str], columns: Dict[str, np.ndarray]):
+        """
+        Appends several periods given as one array per PeriodStore column.
+        Either every row is added or, if the columns are malformed, none are.
+        """
+        # Checked before anything is logged, so malformed rows never reach disk
+        labels, columns = PeriodStore.prepare(labels, columns)
+        with self._write_lock:
+            if self.log is not None:
+                self.log.append_columns(labels, columns)
+            start = len(self._store)
+            self._store.extend(labels, columns)
+            self._update_running_state(start)
+            self._publish()
+
+    def add_transactions(self, path: str, cc_rate: float, conv_fee: float, **options) -> IngestResult:
+        """
+        Aggregates a CSV or Parquet file of individual payments into periods
+        and appends them in one add_columns call. options are passed on to
+        transactions.aggregate_transactions (e.g. date_column, frequency).
+        """
+        result = aggregate_transactions(path, cc_rate, conv_fee, **options)
+        self.add_columns(result.labels, result.columns)
+        return result
+
+    def clear_periods(self):
+        """Removes all periods and drops the running ROI state."""
+        with self._write_lock:
+            if self.log is not None:
+                self.log.append_clear()
+            self._invalidate()
+            self._publish()
+
+    def replace_periods(self, periods: List[TransactionPeriod]):
+        """
+        Replaces the stored periods and rebuilds the running ROI state.
+        Any edit to existing periods must go through here (or clear_periods).
+        """
+        labels, columns = PeriodStore.prepare(
+            [p.period for p in periods],
+            {name: [getattr(p, name) for p in periods] for name in PeriodStore.COLUMNS},
+        )
+        with self._write_lock:
+            # Build the replacement in fresh buffers and only keep it once it
+            # is built and logged; on failure the old periods stay in place
+            previous = self._epoch, self._store, self._cumulative_savings, self._forecaster
+            try:
+                self._invalidate()
+                self._store.extend(labels, columns)
+                self._update_running_state(0)
+                if self.log is not None:
+                    self.log.replace_columns(labels, columns)
+            except Exception:
+                self._epoch, self._store, self._cumulative_savings, self._forecaster = previous
+                raise
+            self._publish()
+
+    def _publish(self):
+        """Publishes the working buffers as a new immutable EngineState."""
+        self._state = EngineState(
+            version=next(_versions),
+            epoch=self._epoch,
+            periods=len(self._store),
+            labels=self._store.labels,
+            columns={name: _read_only(column) for name, column in self._store.columns().items()},
+            cumulative_savings=_read_only(self._cumulative_savings.view()),
+            forecaster=self._forecaster.frozen(),
+        )
+
+    def _invalidate(self):
+        self._epoch += 1
+        # Fresh buffers rather than truncation, so published states that
+        # still hold views of the old data are unaffected
+        self._store = PeriodStore()
+        # Running per-period state, extended as periods are appended so that
+        # calculate_roi only has to slice it for any current_period prefix.
+        self._cumulative_savings = GrowableArray(np.float64)
+        self._forecaster = StreamingForecaster()
+        self._forecaster.append(-self.SUBSCRIPTION_COST)  # Period 0
+
+    def _update_running_state(self, start: int):
+        """Extends the running state over store rows [start, len(store))."""
+        columns = {name: column[start:] for name, column in self._store.columns().items()}
+        period_savings = savings_breakdown(columns, self.ACH_COST_PER_TRANSACTION)["period_savings"]
+        # Seed with the running total so the sums accumulate period by period
+        cumulative = np.cumsum(np.concatenate(([self._cumulative_savings.last()], period_savings)))[1:]
+        self._cumulative_savings.extend(cumulative)
+        # Calculate ROI as actual dollar amount saved relative to subscription cost
+        self._forecaster.extend(cumulative - self.SUBSCRIPTION_COST)
         
     def get_periods(self) -> List[Dict]:
         """
         Returns all transaction periods as a list of dictionaries.
         Each dictionary contains the period data in a format suitable for API responses.
         """
+        state = self._state
+        columns = {name: column.tolist() for name, column in state.columns.items()}
         return [
             {
-                "period": p.period,
-                "cc_volume": p.cc_volume,
-                "cc_count": p.cc_count,
-                "ach_volume": p.ach_volume,
-                "ach_count": p.ach_count,
-                "cc_rate": p.cc_rate,
-                "conv_fee": p.conv_fee,
+                "period": label,
+                "cc_volume": columns["cc_volume"][i],
+                "cc_count": columns["cc_count"][i],
+                "ach_volume": columns["ach_volume"][i],
+                "ach_count": columns["ach_count"][i],
+                "cc_rate": columns["cc_rate"][i],
+                "conv_fee": columns["conv_fee"][i],
             }
-            for p in self.periods
+            for i, label in enumerate(state.labels[:state.periods])
         ]
     
+    def snapshot(self, current_period: int = None, state: Optional[EngineState] = None) -> ROISnapshot:
+        """
+        Returns the ROI snapshot for the given current_period, computing it
+        at most once per data version. Uses the current published state
+        unless an earlier one is passed in. Safe to call from any thread.
+        """
+        state = self._state if state is None else state
+        # Every current_period that exposes the same number of periods yields
+        # the same results, so cache on that count rather than the raw value.
+        visible = len(range(state.periods)[:current_period])
+        snapshot = state.snapshots.get(visible)
+        if snapshot is not None:
+            return snapshot
+
+        with STAGE_SECONDS.labels("roi_calculation").time():
+            snapshot = self._compute_snapshot(state, visible)
+        state.snapshots[visible] = snapshot
+        if len(state.snapshots) > self.SNAPSHOT_CACHE_SIZE:
+            # Oldest first; another reader may already have dropped it
+            state.snapshots.pop(next(iter(state.snapshots), None), None)
+        return snapshot
+
+    def _compute_snapshot(self, state: EngineState, visible: int) -> ROISnapshot:
+        cumulative_savings = state.cumulative_savings[:visible]
+        roi = cumulative_savings - self.SUBSCRIPTION_COST
+        current_roi = float(roi[-1]) if visible else None
+        
+        # Calculate forecasts if we have enough data
+        with STAGE_SECONDS.labels("regression_fit").time():
+            coefficients = state.forecaster.fit(visible + 1) if visible >= 2 else None
+            if coefficients is not None:
+                forecasts = state.forecaster.predict(visible + 1)
+                break_even_period = state.forecaster.break_even_period(visible + 1)
+            else:
+                forecasts = np.zeros(visible + 1)
+                forecasts[0] = -self.SUBSCRIPTION_COST
+                break_even_period = None
+        
+        with STAGE_SECONDS.labels("trajectory_analysis").time():
+            will_achieve_target, periods_to_roi, savings_rate = self._compute_trajectory(roi)
+        with STAGE_SECONDS.labels("alert_generation").time():
+            alerts = self._compute_alerts(current_roi, will_achieve_target, periods_to_roi, savings_rate)
+        return ROISnapshot(
+            version=state.version,
+            epoch=state.epoch,
+            visible_periods=visible,
+            subscription_cost=self.SUBSCRIPTION_COST,
+            ach_cost_per_transaction=self.ACH_COST_PER_TRANSACTION,
+            labels=state.labels,
+            columns={name: column[:visible] for name, column in state.columns.items()},
+            cumulative_savings=cumulative_savings,
+            roi=_read_only(roi),
+            forecasts=_read_only(forecasts),
+            will_achieve_target=will_achieve_target,
+            periods_to_roi=periods_to_roi,
+            savings_rate=savings_rate,
+            alerts=tuple(alerts),
+            forecast_slope=float(coefficients[0]) if coefficients else None,
+            forecast_intercept=float(coefficients[1]) if coefficients else None,
+            break_even_period=break_even_period,
+        )
+
     def analyze_roi_trajectory(self, current_period: int = None) -> Tuple[bool, Optional[int], Optional[float]]:
         """
         Analyzes the ROI trajectory to determine:
@@ -56,16 +462,97 @@ class ROIEngine:
         - periods_to_roi: Optional[int]
         - savings_rate: Optional[float]
         """
-        results = self.calculate_roi(current_period)
-        if len(results) < 2:
+        return self.snapshot(current_period).trajectory
+        
+    def calculate_roi(self, current_period: int = None) -> List[dict]:
+        return list(self.snapshot(current_period).results)
+
+    def get_alerts(self, current_period: int = None, probabilistic: bool = False) -> List[Dict]:
+        """
+        Generate alerts based on ROI status and trajectory analysis. With
+        probabilistic, also alert on the Monte Carlo break-even forecast.
+        Rule alerts alert_tracker has seen fire keep the timestamp they
+        fired at. Does not evaluate the tracker; the API does that on writes.
+        """
+        alerts = self.alert_tracker.stamp(self.snapshot(current_period).alerts)
+        if probabilistic:
+            alerts.extend(self.forecast_alerts(self.forecast_break_even(current_period)))
+        return alerts
+
+    def forecast_break_even(self, current_period: int = None, paths: int = DEFAULT_PATHS,
+                            horizon: int = None, seed: int = 0,
+                            state: Optional[EngineState] = None) -> Optional[BreakEvenForecast]:
+        """
+        Monte Carlo forecast of the periods until break-even, bootstrapping
+        future period savings from the periods visible at current_period.
+        Computed once per data version and parameters. Returns None until
+        there are two periods to sample from.
+        """
+        state = self._state if state is None else state
+        horizon = self.BREAK_EVEN_HORIZON if horizon is None else horizon
+        visible = len(range(state.periods)[:current_period])
+        if visible < 2:
+            return None
+        key = (visible, paths, horizon, seed)
+        forecast = state.break_even_forecasts.get(key)
+        if forecast is not None:
+            return forecast
+
+        snapshot = self.snapshot(current_period, state=state)
+        with STAGE_SECONDS.labels("break_even_simulation").time():
+            period_savings = savings_breakdown(snapshot.columns, self.ACH_COST_PER_TRANSACTION)["period_savings"]
+            forecast = forecast_break_even(period_savings, snapshot.current_roi, self.TARGET_PERIODS_TO_ROI,
+                                           horizon, paths, seed)
+        state.break_even_forecasts[key] = forecast
+        if len(state.break_even_forecasts) > self.SNAPSHOT_CACHE_SIZE:
+            # Oldest first; another reader may already have dropped it
+            state.break_even_forecasts.pop(next(iter(state.break_even_forecasts), None), None)
+        return forecast
+
+    def project_roi(self, periods_ahead: int, current_period: int = None) -> List[float]:
+        """
+        Projects the linear ROI trend over the next periods_ahead periods after
+        current_period. Returns an empty list until there are two periods.
+        """
+        state = self._state
+        visible = len(range(state.periods)[:current_period])
+        if visible < 2:
+            return []
+        return state.forecaster.project(periods_ahead, visible + 1).tolist()
+
+    def sweep_scenarios(self, current_period: int = None,
+                        subscription_costs: Optional[List[float]] = None,
+                        ach_costs_per_transaction: Optional[List[float]] = None,
+                        target_periods: Optional[List[int]] = None,
+                        cc_rates: Optional[List[float]] = None,
+                        conv_fees: Optional[List[float]] = None,
+                        include_curves: bool = False,
+                        state: Optional[EngineState] = None) -> Dict[str, np.ndarray]:
+        """
+        What-if sweep over the periods visible at current_period, for every
+        combination of the given parameter grids. Grids left as None use the
+        engine's constants, or each period's own cc_rate / conv_fee.
+        """
+        snapshot = self.snapshot(current_period, state=state)
+        return sweep_scenarios(
+            snapshot.columns,
+            subscription_costs or [self.SUBSCRIPTION_COST],
+            ach_costs_per_transaction or [self.ACH_COST_PER_TRANSACTION],
+            target_periods or [self.TARGET_PERIODS_TO_ROI],
+            cc_rates=cc_rates,
+            conv_fees=conv_fees,
+            include_curves=include_curves,
+        )
+
+    def _compute_trajectory(self, roi: np.ndarray) -> Tuple[bool, Optional[int], Optional[float]]:
+        if len(roi) < 1:
             return False, None, None
             
         # Get the last ROI value and the savings trend
-        current_roi = results[-1]["roi"]
+        current_roi = float(roi[-1])
         
-        # Calculate average period-over-period savings increase
-        roi_values = [r["roi"] for r in results if r["period"] != "Period 0"]  # Exclude period 0
-        savings_rate = (roi_values[-1] - roi_values[0]) / len(roi_values)
+        # Calculate average period-over-period savings increase (period 0 excluded)
+        savings_rate = float(roi[-1] - roi[0]) / len(roi)
         
         if current_roi >= 0:
             return True, 0, savings_rate
@@ -79,140 +566,98 @@ class ROIEngine:
         
         return will_achieve_target, periods_to_roi, savings_rate
         
-    def calculate_roi(self, current_period: int = None) -> List[dict]:
-        results = []
-        
-        # Add period 0 with initial subscription cost
-        results.append({
-            "period": "Period 0",
-            "roi": -self.SUBSCRIPTION_COST,
-            "forecast": -self.SUBSCRIPTION_COST,
-            "raw_numbers": {
-                "subscription_cost": self.SUBSCRIPTION_COST,
-                "cumulative_savings": 0,
-                "period_savings": 0,
-                "cc_fee_savings": 0,
-                "ach_costs": 0,
-            }
-        })
-        
-        if not self.periods:
-            return results
-            
-        cumulative_savings = 0
-        roi_values = [-self.SUBSCRIPTION_COST]  # Start with period 0
-        
-        periods_to_process = self.periods[:current_period] if current_period is not None else self.periods
-                
-        for period in periods_to_process:
-            # Calculate what it would cost if all volume was processed via credit cards
-            total_volume = period.cc_volume + period.ach_volume
-            potential_cc_cost = total_volume * (period.cc_rate / 100)
-            
-            # Calculate actual costs for each payment method
-            actual_cc_cost = period.cc_volume * (period.conv_fee / 100)  # Using convenience fee rate
-            ach_costs = period.ach_count * self.ACH_COST_PER_TRANSACTION  # Fixed cost per ACH transaction
-            
-            # Calculate savings from each payment method
-            cc_fee_savings = (period.cc_volume * (period.cc_rate / 100)) - actual_cc_cost
-            ach_savings = (period.ach_volume * (period.cc_rate / 100)) - ach_costs
-            
-            # Total period savings
-            period_savings = cc_fee_savings + ach_savings
-            cumulative_savings += period_savings
-            
-            # Calculate ROI as actual dollar amount saved relative to subscription cost
-            roi_amount = cumulative_savings - self.SUBSCRIPTION_COST
-            roi_values.append(roi_amount)
-            
-            results.append({
-                "period": period.period,
-                "roi": roi_amount,
-                "forecast": 0,  # Will be updated with forecasts
-                "raw_numbers": {
-                    "subscription_cost": self.SUBSCRIPTION_COST,
-                    "cumulative_savings": cumulative_savings,
-                    "period_savings": period_savings,
-                    "cc_fee_savings": cc_fee_savings,
-                    "ach_costs": ach_costs,
-                    "ach_savings": ach_savings,
-                    "potential_cc_cost": potential_cc_cost,
-                    "actual_cc_cost": actual_cc_cost
-                }
-            })
-        
-        # Calculate forecasts if we have enough data
-        if len(periods_to_process) >= 2:
-            X = np.array(range(len(roi_values))).reshape(-1, 1)
-            y = np.array(roi_values)
-            
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            all_forecasts = model.predict(X)
-            
-            for i in range(len(results)):
-                results[i]["forecast"] = all_forecasts[i]
-                
-        return results
-
-    def get_alerts(self, current_period: int = None) -> List[Dict]:
-        """Generate alerts based on ROI status and trajectory analysis"""
+    def _compute_alerts(self, current_roi: Optional[float], will_achieve_target: bool,
+                        periods_to_roi: Optional[int], savings_rate: Optional[float]) -> List[Dict]:
+        """Generate alerts based on ROI status and trajectory analysis, one per rule that holds"""
         alerts = []
-        results = self.calculate_roi(current_period)
         
-        if len(results) <= 1:  # Only period 0
+        if current_roi is None:  # Only period 0
             return [{
+                'rule_id': 'initial_investment',
                 'type': 'info',
-                'message': f'Initial investment: ${self.SUBSCRIPTION_COST:,.2f}',
-                'timestamp': datetime.now().isoformat()
+                'message': f'Initial investment: ${self.SUBSCRIPTION_COST:,.2f}'
             }]
             
-        current_roi = results[-1]["roi"]
-        will_achieve_target, periods_to_roi, savings_rate = self.analyze_roi_trajectory(current_period)
-        
         # Alert for break-even achievement
         if current_roi > 0:
             alerts.append({
+                'rule_id': 'break_even_achieved',
                 'type': 'success',
-                'message': f'Break-even achieved! Current savings: ${current_roi:,.2f} above subscription cost',
-                'timestamp': datetime.now().isoformat()
+                'message': f'Break-even achieved! Current savings: ${current_roi:,.2f} above subscription cost'
             })
             
             # Add info about monthly savings rate
             if savings_rate:
                 alerts.append({
+                    'rule_id': 'savings_rate',
                     'type': 'info',
-                    'message': f'Average savings increase per period: ${savings_rate:,.2f}',
-                    'timestamp': datetime.now().isoformat()
+                    'message': f'Average savings increase per period: ${savings_rate:,.2f}'
                 })
         else:
             remaining_to_breakeven = abs(current_roi)
             alerts.append({
+                'rule_id': 'remaining_to_break_even',
                 'type': 'info',
-                'message': f'${remaining_to_breakeven:,.2f} more in savings needed to break even',
-                'timestamp': datetime.now().isoformat()
+                'message': f'${remaining_to_breakeven:,.2f} more in savings needed to break even'
             })
             
             # Alert about ROI trajectory
             if periods_to_roi is not None:
                 if will_achieve_target:
                     alerts.append({
+                        'rule_id': 'on_track',
                         'type': 'info',
-                        'message': f'On track to achieve ROI in {periods_to_roi} periods',
-                        'timestamp': datetime.now().isoformat()
+                        'message': f'On track to achieve ROI in {periods_to_roi} periods'
                     })
                 else:
                     alerts.append({
+                        'rule_id': 'trajectory_concerning',
                         'type': 'warning',
-                        'message': f'ROI trajectory concerning - projected to take {periods_to_roi} periods (target: {self.TARGET_PERIODS_TO_ROI})',
-                        'timestamp': datetime.now().isoformat()
+                        'message': f'ROI trajectory concerning - projected to take {periods_to_roi} periods (target: {self.TARGET_PERIODS_TO_ROI})'
                     })
             elif savings_rate <= 0:
                 alerts.append({
+                    'rule_id': 'declining_savings',
                     'type': 'error',
-                    'message': 'Critical: Current trajectory shows decreasing or flat savings rate',
-                    'timestamp': datetime.now().isoformat()
+                    'message': 'Critical: Current trajectory shows decreasing or flat savings rate'
                 })
 
-        return alerts 
\ No newline at end of file
+        return alerts 
+
+    def forecast_alerts(self, forecast: Optional[BreakEvenForecast]) -> List[Dict]:
+        """
+        Alerts on the break-even probability of a Monte Carlo forecast from
+        forecast_break_even. The alert keeps the timestamp it fired at for
+        as long as later forecasts give it the same type.
+        """
+        # Nothing to add before there is a forecast, or after break-even
+        if forecast is None or forecast.p90 == 0:
+            self._forecast_alert = None
+            return []
+        probability = forecast.probability_within_target
+        if probability < self.LOW_BREAK_EVEN_PROBABILITY:
+            median = f'{forecast.p50} periods' if forecast.p50 is not None else f'over {forecast.horizon} periods'
+            alert = {
+                'rule_id': 'break_even_probability',
+                'type': 'warning',
+                'message': f'Only a {probability:.0%} chance of breaking even within {self.TARGET_PERIODS_TO_ROI} periods (median: {median})',
+            }
+        elif probability >= self.HIGH_BREAK_EVEN_PROBABILITY:
+            alert = {
+                'rule_id': 'break_even_probability',
+                'type': 'success',
+                'message': f'{probability:.0%} chance of breaking even within {self.TARGET_PERIODS_TO_ROI} periods (P10-P90: {forecast.p10}-{forecast.p90} periods)',
+            }
+        else:
+            alert = {
+                'rule_id': 'break_even_probability',
+                'type': 'info',
+                'message': f'{probability:.0%} chance of breaking even within {self.TARGET_PERIODS_TO_ROI} periods',
+            }
+        previous = self._forecast_alert
+        if previous is not None and previous['type'] == alert['type']:
+            alert['timestamp'] = previous['timestamp']
+        else:
+            alert['timestamp'] = datetime.now().isoformat()
+        self._forecast_alert = alert
+        return [dict(alert)]
\ No newline at end of file
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Scenario x period cells evaluated per block, to bound peak memory
+BLOCK_CELLS = 4_000_000
+TIME_BLOCK = 4096  # Periods scanned per step of the break-even search
+
+def sweep_scenarios(columns: Dict[str, np.ndarray],
+                    subscription_costs: Sequence[float],
+                    ach_costs_per_transaction: Sequence[float],
+                    target_periods: Sequence[int],
+                    cc_rates: Optional[Sequence[float]] = None,
+                    conv_fees: Optional[Sequence[float]] = None,
+                    include_curves: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Evaluates the ROI curve for every combination of the given parameter
+    grids over one set of periods. cc_rates / conv_fees of None keep each
+    period's own rate, as ROIEngine does.
+
+    Cumulative savings are linear in the parameters, so they are written as
+    a (scenarios x 3) coefficient matrix times three prefix-summed base
+    series (gross card fees avoided, convenience fees, ACH transactions),
+    and each block of scenarios is one matrix product. The break-even
+    search walks forward in time and stops evaluating a scenario once it
+    has broken even. Returns one array per output, scenarios in row-major
+    order of the grids (subscription cost, ACH cost, target, CC rate,
+    convenience fee).
+    """
+    cc_volume = np.asarray(columns["cc_volume"], dtype=np.float64)
+    ach_volume = np.asarray(columns["ach_volume"], dtype=np.float64)
+    ach_count = np.asarray(columns["ach_count"], dtype=np.float64)
+    periods = len(cc_volume)
+
+    rate_grid = [np.nan] if cc_rates is None else list(cc_rates)
+    fee_grid = [np.nan] if conv_fees is None else list(conv_fees)
+    grids = np.meshgrid(subscription_costs, ach_costs_per_transaction, target_periods,
+                        rate_grid, fee_grid, indexing="ij")
+    subscription, ach_cost, target, cc_rate, conv_fee = (g.ravel().astype(np.float64) for g in grids)
+    count = len(subscription)
+
+    # Base series and the per-scenario coefficient applied to each
+    if cc_rates is None:
+        rate_base = (cc_volume + ach_volume) * (np.asarray(columns["cc_rate"], dtype=np.float64) / 100)
+        rate_coef = np.ones(count)
+    else:
+        rate_base = cc_volume + ach_volume
+        rate_coef = cc_rate / 100
+    if conv_fees is None:
+        fee_base = cc_volume * (np.asarray(columns["conv_fee"], dtype=np.float64) / 100)
+        fee_coef = -np.ones(count)
+    else:
+        fee_base = cc_volume
+        fee_coef = -conv_fee / 100
+    bases = np.cumsum(np.vstack([rate_base, fee_base, ach_count]), axis=1)
+    coefficients = np.column_stack([rate_coef, fee_coef, -ach_cost])
+
+    final_roi = -subscription
+    break_even_period = np.full(count, -1, dtype=np.int64)
+    if periods:
+        final_roi = coefficients @ bases[:, -1] - subscription
+        # Scan forward in time blocks, dropping scenarios once they break even
+        pending = np.arange(count)
+        for t0 in range(0, periods, TIME_BLOCK):
+            t1 = min(t0 + TIME_BLOCK, periods)
+            step = max(1, BLOCK_CELLS // (t1 - t0))
+            for lo in range(0, len(pending), step):
+                rows = pending[lo:lo + step]
+                reached = coefficients[rows] @ bases[:, t0:t1] >= subscription[rows, None]
+                first = reached.argmax(axis=1)
+                hit = reached[np.arange(len(rows)), first]
+                break_even_period[rows[hit]] = t0 + first[hit] + 1
+            pending = pending[break_even_period[pending] < 0]
+            if not len(pending):
+                break
+    curves = None
+    if include_curves:
+        curves = coefficients @ bases - subscription[:, None]
+
+    result = {
+        "subscription_cost": subscription,
+        "ach_cost_per_transaction": ach_cost,
+        "target_periods": target.astype(np.int64),
+        "cc_rate": cc_rate,
+        "conv_fee": conv_fee,
+        "final_roi": final_roi,
+        "break_even_period": break_even_period,
+        "achieves_target": (break_even_period > 0) & (break_even_period <= target),
+    }
+    if curves is not None:
+        result["roi_curve"] = curves
+    return result
+
+def scenario_rows(result: Dict[str, np.ndarray]) -> Dict[str, List]:
+    """Converts a sweep result to JSON-ready lists, with None for unset values."""
+    rows = {}
+    for name, values in result.items():
+        if name == "break_even_period":
+            rows[name] = [p if p > 0 else None for p in values.tolist()]
+        elif name in ("cc_rate", "conv_fee"):
+            rows[name] = [None if np.isnan(v) else v for v in values.tolist()]
+        else:
+            rows[name] = values.tolist()
+    return rows
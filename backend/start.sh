@@ -6,7 +6,8 @@ uvicorn api:app --host 0.0.0.0 --port 8000 &
 # Store the PID of the backend process
 BACKEND_PID=$!
 
-# Wait for the backend to be ready and then load the data
+# Wait for the backend to be ready and seed the sample data. Periods persist
+# in ROI_DATA_DIR, so this only loads into an empty API and never deletes.
 python /app/scripts/load_data.py
 
 # Keep the container running with the backend process
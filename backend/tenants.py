@@ -0,0 +1,269 @@
+from typing import AsyncIterator, Callable, Dict, List, Optional, TypeVar
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
+import asyncio
+import os
+import re
+import weakref
+from alerts import AlertTracker
+from period_log import PeriodLog
+from roi_engine import ROIEngine
+
+# Tenant IDs become file names, so keep them to a safe character set
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+def check_tenant_id(tenant_id: str):
+    if not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError(f"Invalid tenant ID: {tenant_id!r}")
+
+@dataclass
+class TenantState:
+    """An engine together with the dashboard's replay position for one tenant."""
+    tenant_id: str
+    engine: ROIEngine
+    current_period: int = 0
+    # Set (and replaced) whenever the data or current_period changes
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+    # Counts those changes, to order alert evaluations started concurrently
+    revision: int = 0
+    # Set once the registry has saved and dropped this state
+    evicted: bool = False
+    # Set by the tenant's next change; watchers of an evicted state wait on
+    # it before rebuilding the tenant, so nothing is reloaded for them alone
+    next_change: Optional[asyncio.Event] = field(default=None, repr=False, compare=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.engine.nbytes
+
+    def notify_changed(self):
+        """Wakes everything waiting on the current changed event."""
+        self.revision += 1
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+        if self.next_change is not None:
+            self.next_change.set()
+            self.next_change = None
+
+    def mark_evicted(self, next_change: asyncio.Event):
+        """Wakes everything waiting on this state so it can be let go of, without counting as a change."""
+        self.evicted = True
+        self.next_change = next_change
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+class EngineStorage:
+    """
+    Keeps each tenant's periods in a PeriodLog under directory, so tenants
+    survive restarts and evicted ones can be rebuilt on demand. Alert
+    transitions are journaled alongside the log as they are recorded; the
+    replay position is written when a tenant is saved.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, tenant_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{tenant_id}{suffix}")
+
+    def _write(self, path: str, content: str):
+        with open(path + ".tmp", "w") as f:
+            f.write(content)
+        os.replace(path + ".tmp", path)
+
+    def save(self, state: TenantState):
+        """Flushes the tenant's logs to disk and closes them."""
+        if state.engine.log is not None:
+            state.engine.log.close()
+        tracker = state.engine.alert_tracker
+        # Records the last change's transitions if its evaluation has not run yet
+        tracker.evaluate(state.engine.snapshot(state.current_period))
+        tracker.close()
+        self._write(self._path(state.tenant_id, ".cursor"), str(state.current_period))
+
+    def load(self, tenant_id: str) -> TenantState:
+        """Rebuilds the tenant from its log, creating an empty log if needed."""
+        engine = ROIEngine.from_log(PeriodLog(self._path(tenant_id, ".log")))
+        current_period = 0
+        cursor_path = self._path(tenant_id, ".cursor")
+        if os.path.exists(cursor_path):
+            with open(cursor_path) as f:
+                current_period = int(f.read().strip() or 0)
+        engine.alert_tracker = AlertTracker.open(self._path(tenant_id, ".alerts"))
+        # Reads do not evaluate, so bring the alerts in line with the data and
+        # cursor now. The journal may be ahead of the cursor, which is only
+        # written on save, after an unclean shutdown; this records only real changes.
+        engine.alert_tracker.evaluate(engine.snapshot(current_period))
+        return TenantState(tenant_id, engine, current_period)
+
+T = TypeVar("T")
+
+class EngineRegistry:
+    """
+    Holds one TenantState per tenant ID. Once the engines together exceed
+    memory_budget bytes, the least recently used tenants are saved and
+    dropped from memory, to be rebuilt from storage when next requested.
+    Without storage nothing is evicted, since it could not be rebuilt.
+
+    The async methods (fetch, writing, enforce_budget_async) are for use on
+    the event loop: they load and save tenants in executor, holding the
+    tenant's lock so that loads, saves and writes of one tenant never
+    overlap. The sync ones do the I/O in the calling thread.
+    """
+
+    def __init__(self, storage: Optional[EngineStorage] = None, memory_budget: int = 512 * 1024 * 1024,
+                 executor: Optional[Executor] = None):
+        self.storage = storage
+        self.memory_budget = memory_budget
+        self.executor = executor
+        self._tenants: "OrderedDict[str, TenantState]" = OrderedDict()
+        # Held while a tenant is loaded, saved or written; dropped once unused
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Done once an evicted tenant's save finishes, so it is not rebuilt from stale files
+        self._saving: Dict[str, asyncio.Future] = {}
+        # next_change events of evicted tenants, handed on when they are rebuilt
+        self._next_change: Dict[str, asyncio.Event] = {}
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(state.nbytes for state in self._tenants.values())
+
+    def tenants(self) -> Dict[str, TenantState]:
+        """The tenants currently held in memory."""
+        return dict(self._tenants)
+
+    def lock(self, tenant_id: str) -> asyncio.Lock:
+        """The lock serializing loads, saves and writes of one tenant."""
+        lock = self._locks.get(tenant_id)
+        if lock is None:
+            lock = self._locks[tenant_id] = asyncio.Lock()
+        return lock
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args))
+
+    def _cached(self, tenant_id: str) -> Optional[TenantState]:
+        check_tenant_id(tenant_id)
+        state = self._tenants.get(tenant_id)
+        if state is not None:
+            self._tenants.move_to_end(tenant_id)
+        return state
+
+    def _load(self, tenant_id: str) -> TenantState:
+        if self.storage is not None:
+            return self.storage.load(tenant_id)
+        return TenantState(tenant_id, ROIEngine())
+
+    def _add(self, state: TenantState):
+        state.next_change = self._next_change.pop(state.tenant_id, None)
+        self._tenants[state.tenant_id] = state
+
+    def get(self, tenant_id: str) -> TenantState:
+        """
+        Returns the tenant's state, rebuilding it from storage or creating an
+        empty one if it is not in memory, and marks it most recently used.
+        """
+        state = self._cached(tenant_id)
+        if state is None:
+            state = self._load(tenant_id)
+            self._add(state)
+            self.enforce_budget()
+        return state
+
+    async def fetch(self, tenant_id: str) -> TenantState:
+        """Like get, but rebuilds the tenant in the executor."""
+        state = self._cached(tenant_id)
+        if state is not None:
+            return state
+        saving = self._saving.get(tenant_id)
+        if saving is not None:
+            # wait() rather than await, so a cancelled fetch does not cancel the save
+            await asyncio.wait([saving])
+        async with self.lock(tenant_id):
+            # Another fetch may have rebuilt it while this one waited
+            state = self._cached(tenant_id)
+            if state is None:
+                state = await self._run(self._load, tenant_id)
+                self._add(state)
+        await self.enforce_budget_async()
+        return state
+
+    @asynccontextmanager
+    async def writing(self, tenant_id: str) -> AsyncIterator[TenantState]:
+        """
+        The tenant's state, locked for a write: it is not saved, so not
+        evicted from under the writer, until the block exits.
+        """
+        while True:
+            state = await self.fetch(tenant_id)
+            async with self.lock(tenant_id):
+                # Evicted between the fetch and taking the lock; rebuild it
+                if not state.evicted:
+                    yield state
+                    return
+
+    def _drop(self, tenant_id: str) -> Optional[TenantState]:
+        """Drops a tenant from memory, waking its watchers, without saving it yet."""
+        state = self._tenants.pop(tenant_id, None)
+        if state is not None:
+            # Let watchers drop the evicted state; they rebuild the tenant on its next change
+            next_change = state.next_change or asyncio.Event()
+            self._next_change[tenant_id] = next_change
+            state.mark_evicted(next_change)
+        return state
+
+    def evict(self, tenant_id: str):
+        """Saves a tenant to storage and drops it from memory."""
+        state = self._drop(tenant_id)
+        if state is not None and self.storage is not None:
+            self.storage.save(state)
+
+    def close(self):
+        """Saves every tenant held in memory, e.g. on shutdown."""
+        while self._tenants:
+            self.evict(next(iter(self._tenants)))
+
+    def _over_budget(self) -> List[str]:
+        """The least recently used tenants to evict to bring memory within budget."""
+        if self.storage is None:
+            return []
+        total = self.nbytes
+        tenant_ids = []
+        # Never evict the most recently used tenant; it is about to be served
+        for tenant_id, state in list(self._tenants.items())[:-1]:
+            if total <= self.memory_budget:
+                break
+            total -= state.nbytes
+            tenant_ids.append(tenant_id)
+        return tenant_ids
+
+    def enforce_budget(self):
+        """Evicts least recently used tenants until memory is within budget."""
+        for tenant_id in self._over_budget():
+            self.evict(tenant_id)
+
+    async def enforce_budget_async(self):
+        """Like enforce_budget, but saves the evicted tenants in the executor."""
+        async def save(state: TenantState):
+            try:
+                async with self.lock(state.tenant_id):
+                    await self._run(self.storage.save, state)
+            finally:
+                self._saving.pop(state.tenant_id).set_result(None)
+
+        states = [self._drop(tenant_id) for tenant_id in self._over_budget()]
+        # Registered before anything else can run, so no fetch misses them
+        for state in states:
+            self._saving[state.tenant_id] = asyncio.get_running_loop().create_future()
+        if states:
+            await asyncio.gather(*(save(state) for state in states))
@@ -0,0 +1,356 @@
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import csv
+import os
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: without it, CSV is read with the csv module and Parquet is unsupported
+    pa = None
+
+CHUNK_ROWS = 1_000_000  # Payments read and aggregated per chunk
+
+# Payment method values (compared case-insensitively) counted as card or ACH;
+# payments with any other method are skipped
+CC_METHODS = frozenset({"cc", "card", "credit_card", "credit card"})
+ACH_METHODS = frozenset({"ach", "bank_transfer", "bank transfer", "echeck"})
+METHOD_CC, METHOD_ACH, METHOD_OTHER = 0, 1, 2
+
+# Period lengths for date-bucketed ingestion, as NumPy datetime64 units.
+# Weeks are bucketed from days instead, since NumPy's start on Thursday.
+FREQUENCIES = {"day": "D", "week": "W", "month": "M", "year": "Y"}
+# Days from the Monday before the epoch (1969-12-29) to the epoch
+WEEK_OFFSET_DAYS = 3
+
+@dataclass
+class TransactionChunk:
+    """
+    One chunk of payments as integer arrays. keys are date bucket numbers,
+    or indexes into labels when periods come from a label column.
+    """
+    keys: np.ndarray  # int64
+    labels: Optional[List[str]]
+    methods: np.ndarray  # int8 METHOD_* codes
+    amounts: np.ndarray  # int64 cents
+    skipped: int = 0  # Rows dropped while decoding, e.g. for a missing or malformed amount
+
+@dataclass
+class IngestResult:
+    """Periods aggregated from a payments file, as labels and PeriodStore columns."""
+    labels: List[str]
+    columns: Dict[str, np.ndarray]
+    rows: int  # Payments read
+    skipped: int  # Payments not counted: unknown method, or a missing or malformed amount, date or label
+
+def _method_codes(values: Sequence) -> np.ndarray:
+    """METHOD_* code for each distinct method value, in order."""
+    codes = np.full(len(values), METHOD_OTHER, dtype=np.int8)
+    for i, value in enumerate(values):
+        method = str(value).strip().lower() if value is not None else ""
+        if method in CC_METHODS:
+            codes[i] = METHOD_CC
+        elif method in ACH_METHODS:
+            codes[i] = METHOD_ACH
+    return codes
+
+def _to_cents(amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Amounts in cents, and a mask of the usable (finite) amounts."""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    valid = np.isfinite(amounts)
+    return np.rint(np.where(valid, amounts, 0) * 100).astype(np.int64), valid
+
+def _cast_or_null(values, target):
+    """
+    values cast to the Arrow type target, null where a value does not
+    convert. Casts the whole column at once, and only goes value by value
+    in a chunk where that fails.
+    """
+    try:
+        return values.cast(target)
+    except pa.ArrowInvalid:
+        converted = []
+        for value in values.to_pylist():
+            try:
+                value = value.strip() if isinstance(value, str) else value
+                converted.append(pa.scalar(value).cast(target).as_py())
+            except pa.ArrowInvalid:
+                converted.append(None)
+        return pa.array(converted, type=target)
+
+def _parse_amounts(values: List[str]) -> np.ndarray:
+    """Amounts parsed from strings, NaN where a value is blank or malformed."""
+    amounts = np.empty(len(values))
+    for i, value in enumerate(values):
+        try:
+            amounts[i] = float(value)
+        except ValueError:
+            amounts[i] = np.nan
+    return amounts
+
+def _parse_dates(values: List[str]) -> np.ndarray:
+    """Dates parsed from strings, NaT where a value is blank or malformed."""
+    values = [value.strip() or "NaT" for value in values]
+    try:
+        return np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        dates = np.empty(len(values), dtype="datetime64[s]")
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value, "s")
+            except ValueError:
+                dates[i] = np.datetime64("NaT")
+        return dates
+
+def _date_keys(dates: np.ndarray, frequency: str) -> np.ndarray:
+    if frequency == "week":
+        # Monday-start ISO weeks
+        days = dates.astype("datetime64[D]").view(np.int64)
+        return (days + WEEK_OFFSET_DAYS) // 7
+    return dates.astype(f"datetime64[{FREQUENCIES[frequency]}]").view(np.int64)
+
+def _chunk_from_arrow(batch, period_column: Optional[str], date_column: Optional[str], frequency: str,
+                      method_column: str, amount_column: str) -> TransactionChunk:
+    # Classify each distinct method once, rather than every row
+    methods = pc.dictionary_encode(batch.column(method_column).cast(pa.string()))
+    method_codes = _method_codes(methods.dictionary.to_pylist())
+    # Null methods have a null index; send them to an extra "other" slot
+    method_codes = np.append(method_codes, METHOD_OTHER)
+    indices = methods.indices.fill_null(len(method_codes) - 1).to_numpy()
+    amounts = _cast_or_null(batch.column(amount_column), pa.float64())
+    amounts, valid = _to_cents(amounts.to_numpy(zero_copy_only=False))
+
+    labels = None
+    if date_column is not None:
+        dates = batch.column(date_column)
+        if not pa.types.is_timestamp(dates.type):
+            dates = _cast_or_null(dates, pa.timestamp("s"))
+        valid &= ~dates.is_null().to_numpy(zero_copy_only=False)
+        dates = dates.fill_null(0).to_numpy(zero_copy_only=False)
+        keys = _date_keys(dates, frequency)
+    else:
+        periods = pc.dictionary_encode(batch.column(period_column).cast(pa.string()))
+        valid &= ~periods.indices.is_null().to_numpy(zero_copy_only=False)
+        keys = periods.indices.fill_null(0).to_numpy().astype(np.int64)
+        labels = periods.dictionary.to_pylist()
+
+    codes = method_codes[indices]
+    return TransactionChunk(keys[valid], labels, codes[valid], amounts[valid], int(len(valid) - valid.sum()))
+
+def _chunk_from_rows(columns: Dict[str, List[str]], period_column: Optional[str], date_column: Optional[str],
+                     frequency: str, method_column: str, amount_column: str) -> TransactionChunk:
+    """Like _chunk_from_arrow, for columns of strings read with the csv module."""
+    methods, method_index = np.unique(np.array(columns[method_column], dtype=object), return_inverse=True)
+    amounts, valid = _to_cents(_parse_amounts(columns[amount_column]))
+
+    labels = None
+    if date_column is not None:
+        dates = _parse_dates(columns[date_column])
+        valid &= ~np.isnat(dates)
+        keys = _date_keys(np.where(valid, dates, np.datetime64(0, "s")), frequency)
+    else:
+        # Number labels in order of first appearance, as the Arrow path does
+        periods = np.array(columns[period_column], dtype=object)
+        # Blank labels read as nulls on the Arrow path
+        valid &= periods != ""
+        values, first, inverse = np.unique(periods, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        keys = rank[inverse]
+        labels = values[order].tolist()
+
+    codes = _method_codes(methods.tolist())[method_index]
+    return TransactionChunk(keys[valid], labels, codes[valid], amounts[valid], int(len(valid) - valid.sum()))
+
+def aggregate_chunk(chunk: TransactionChunk) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Groups a chunk's payments by (period key, method) with one bincount per
+    total. Returns the distinct keys in ascending order, their [card, ACH]
+    volumes in cents and counts, and the number of payments skipped. Periods
+    holding only skipped methods are kept, with zero totals.
+    """
+    keys, methods = chunk.keys, chunk.methods
+    skipped = chunk.skipped + int(np.count_nonzero(methods == METHOD_OTHER))
+    if not len(keys):
+        return keys, np.zeros((0, 2)), np.zeros((0, 2), dtype=np.int64), skipped
+
+    low = int(keys.min())
+    span = int(keys.max()) - low + 1
+    if span <= 2 * len(keys) + 1024:
+        # Dense keys (labels, or consecutive dates): bucket by offset directly
+        slots = (keys - low) * 3 + methods
+        present_keys = None
+    else:
+        present_keys, inverse = np.unique(keys, return_inverse=True)
+        span = len(present_keys)
+        slots = inverse * 3 + methods
+    # Sums of integer cents are exact in float64 up to 2**53 cents
+    volumes = np.bincount(slots, weights=chunk.amounts, minlength=3 * span).reshape(span, 3)
+    counts = np.bincount(slots, minlength=3 * span).reshape(span, 3)
+    if present_keys is None:
+        present = np.flatnonzero(counts.any(axis=1))
+        return low + present, volumes[present, :METHOD_OTHER], counts[present, :METHOD_OTHER], skipped
+    return present_keys, volumes[:, :METHOD_OTHER], counts[:, :METHOD_OTHER], skipped
+
+class PeriodTotals:
+    """Running card/ACH volumes and counts per period, merged chunk by chunk."""
+
+    def __init__(self):
+        self._index: Dict[Hashable, int] = {}
+        self._volumes = np.zeros((0, 2))
+        self._counts = np.zeros((0, 2), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, keys: Sequence[Hashable], volumes: np.ndarray, counts: np.ndarray):
+        index = np.fromiter((self._index.setdefault(key, len(self._index)) for key in keys),
+                            dtype=np.int64, count=len(keys))
+        if len(self._index) > len(self._volumes):
+            grow = max(len(self._index), 2 * len(self._volumes)) - len(self._volumes)
+            self._volumes = np.concatenate((self._volumes, np.zeros((grow, 2))))
+            self._counts = np.concatenate((self._counts, np.zeros((grow, 2), dtype=np.int64)))
+        # Keys within one chunk are distinct, so plain fancy-index adds are safe
+        self._volumes[index] += volumes
+        self._counts[index] += counts
+
+    def totals(self) -> Tuple[List[Hashable], np.ndarray, np.ndarray]:
+        """Keys in order of first appearance, with their volumes (in cents) and counts."""
+        n = len(self._index)
+        return list(self._index), self._volumes[:n], self._counts[:n]
+
+def _file_format(path: str, file_format: Optional[str]) -> str:
+    if file_format is not None:
+        return file_format
+    return "parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv"
+
+def iter_chunks(path: str, period_column: Optional[str] = None, date_column: Optional[str] = None,
+                frequency: str = "month", method_column: str = "method", amount_column: str = "amount",
+                chunk_rows: int = CHUNK_ROWS, file_format: Optional[str] = None) -> Iterator[Tuple[int, object]]:
+    """
+    Reads a payments file in chunks of about chunk_rows rows, yielding
+    (row count, raw chunk) pairs for decode_chunk. Only the needed columns
+    are read, so memory stays bounded by the chunk size.
+    """
+    columns = [period_column or date_column, method_column, amount_column]
+    file_format = _file_format(path, file_format)
+    if file_format == "parquet":
+        if pa is None:
+            raise RuntimeError("Reading Parquet files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.num_rows, batch
+    elif pa is not None:
+        # Read every column as strings, converted per chunk, so a malformed
+        # value only loses its row rather than failing the whole read
+        convert = pa_csv.ConvertOptions(include_columns=columns, strings_can_be_null=True,
+                                        column_types={name: pa.string() for name in columns})
+        # Arrow sizes CSV blocks in bytes; assume ~32 bytes per row
+        read = pa_csv.ReadOptions(block_size=max(1 << 20, chunk_rows * 32))
+        with pa_csv.open_csv(path, read_options=read, convert_options=convert) as reader:
+            for batch in reader:
+                yield batch.num_rows, batch
+    else:
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            positions = [header.index(name) for name in columns]
+            while True:
+                rows = [row for _, row in zip(range(chunk_rows), reader)]
+                if not rows:
+                    break
+                yield len(rows), {name: [row[i] for row in rows] for name, i in zip(columns, positions)}
+
+def decode_chunk(raw, period_column: Optional[str] = None, date_column: Optional[str] = None,
+                 frequency: str = "month", method_column: str = "method",
+                 amount_column: str = "amount") -> TransactionChunk:
+    """Turns a raw chunk from iter_chunks into integer keys, method codes and cents."""
+    if isinstance(raw, dict):
+        return _chunk_from_rows(raw, period_column, date_column, frequency, method_column, amount_column)
+    return _chunk_from_arrow(raw, period_column, date_column, frequency, method_column, amount_column)
+
+def _period_label(key: int, frequency: str) -> str:
+    if frequency == "week":
+        # Label weeks by their Monday
+        return str(np.datetime64(key * 7 - WEEK_OFFSET_DAYS, "D"))
+    return str(np.datetime64(key, FREQUENCIES[frequency]))
+
+def aggregate_transactions(path: str, cc_rate: float, conv_fee: float,
+                           period_column: Optional[str] = None, date_column: Optional[str] = None,
+                           frequency: str = "month", method_column: str = "method",
+                           amount_column: str = "amount", chunk_rows: int = CHUNK_ROWS,
+                           workers: int = 1, file_format: Optional[str] = None) -> IngestResult:
+    """
+    Streams a CSV or Parquet file of individual payments and aggregates it
+    into periods with exact card/ACH volumes and counts, ready for
+    ROIEngine.add_columns. cc_rate and conv_fee are applied to every period.
+
+    Each payment needs a method and an amount, plus either a period label
+    (period_column; periods keep their order of first appearance) or a
+    date (date_column, bucketed by frequency; periods are sorted by date).
+    With workers > 1, chunks are decoded and aggregated in a thread pool
+    while the next ones are read; at most 2 * workers chunks are in flight.
+    """
+    if (period_column is None) == (date_column is None):
+        raise ValueError("Give exactly one of period_column and date_column")
+    if date_column is not None and frequency not in FREQUENCIES:
+        raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+    options = dict(period_column=period_column, date_column=date_column, frequency=frequency,
+                   method_column=method_column, amount_column=amount_column)
+
+    def process(raw) -> Tuple[Sequence[Hashable], np.ndarray, np.ndarray, int]:
+        chunk = decode_chunk(raw, **options)
+        keys, volumes, counts, skipped = aggregate_chunk(chunk)
+        # Chunk-local label indexes become the labels themselves
+        keys = [chunk.labels[k] for k in keys.tolist()] if chunk.labels is not None else keys.tolist()
+        return keys, volumes, counts, skipped
+
+    totals = PeriodTotals()
+    rows = skipped = 0
+
+    def merge(result):
+        nonlocal skipped
+        keys, volumes, counts, chunk_skipped = result
+        totals.add(keys, volumes, counts)
+        skipped += chunk_skipped
+
+    chunks = iter_chunks(path, chunk_rows=chunk_rows, file_format=file_format, **options)
+    if workers <= 1:
+        for count, raw in chunks:
+            rows += count
+            merge(process(raw))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Merge in submission order, so label order follows the file
+            pending = deque()
+            for count, raw in chunks:
+                rows += count
+                pending.append(pool.submit(process, raw))
+                if len(pending) >= 2 * workers:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+
+    keys, volumes, counts = totals.totals()
+    if date_column is not None:
+        order = np.argsort(np.array(keys, dtype=np.int64), kind="stable")
+        keys = [keys[i] for i in order]
+        volumes, counts = volumes[order], counts[order]
+        labels = [_period_label(key, frequency) for key in keys]
+    else:
+        labels = [str(key) for key in keys]
+    n = len(labels)
+    columns = {
+        "cc_volume": volumes[:, METHOD_CC] / 100,
+        "cc_count": counts[:, METHOD_CC].copy(),
+        "ach_volume": volumes[:, METHOD_ACH] / 100,
+        "ach_count": counts[:, METHOD_ACH].copy(),
+        "cc_rate": np.full(n, float(cc_rate)),
+        "conv_fee": np.full(n, float(conv_fee)),
+    }
+    return IngestResult(labels, columns, rows, skipped)
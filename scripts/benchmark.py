@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from load_data import AVG_ACH_TX_AMOUNT, AVG_CC_TX_AMOUNT, CC_RATE, CONV_FEE, data as sample_data
+from roi_engine import ROIEngine, TransactionPeriod
+
+DEFAULT_SIZES = "100,1000,10000,100000,1000000"
+DEFAULT_REPEATS = 30
+TIME_BUDGET = 5.0  # Seconds spent timing one benchmark at one size
+MIN_REPEATS = 3
+STARTUP_RUNS = 5
+REGRESSION_THRESHOLD = 0.2  # Relative slowdown flagged by --compare
+
+def generate_periods(n: int, seed: int = 0) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Generates n synthetic periods shaped like the sample data in load_data:
+    volumes drawn uniformly from the sample's range, counts derived from the
+    average transaction amounts, and the sample's CC rate and fee.
+    """
+    rng = np.random.default_rng(seed)
+    cc_sample = [period["cc_volume"] for period in sample_data]
+    ach_sample = [period["ach_volume"] for period in sample_data]
+    cc_volume = np.round(rng.uniform(min(cc_sample), max(cc_sample), n), 2)
+    ach_volume = np.round(rng.uniform(min(ach_sample), max(ach_sample), n), 2)
+    labels = [f"Period {i + 1}" for i in range(n)]
+    return labels, {
+        "cc_volume": cc_volume,
+        "cc_count": (cc_volume // AVG_CC_TX_AMOUNT).astype(np.int64),
+        "ach_volume": ach_volume,
+        "ach_count": (ach_volume // AVG_ACH_TX_AMOUNT).astype(np.int64),
+        "cc_rate": np.full(n, CC_RATE),
+        "conv_fee": np.full(n, CONV_FEE),
+    }
+
+def ndjson_body(labels: List[str], columns: Dict[str, np.ndarray]) -> bytes:
+    """Encodes periods as the NDJSON body accepted by POST /periods/batch."""
+    values = {name: column.tolist() for name, column in columns.items()}
+    return "\n".join(
+        json.dumps({"period": label, **{name: values[name][i] for name in values}})
+        for i, label in enumerate(labels)
+    ).encode("utf-8")
+
+def drop_caches(engine: ROIEngine):
+    """Forgets cached snapshots and encoded responses, so the next call recomputes."""
+    engine.state.snapshots.clear()
+    if "api" in sys.modules:
+        sys.modules["api"]._roi_responses.clear()
+
+def summarize(name: str, size: int, samples: List[float], peak_bytes: int) -> Dict:
+    ms = np.array(samples) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "name": name,
+        "size": size,
+        "repeats": len(samples),
+        "min_ms": float(ms.min()),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+        "peak_bytes": peak_bytes,
+    }
+
+def bench(name: str, size: int, fn: Callable[[], object], repeats: int,
+          setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Times fn until repeats samples are taken or the time budget runs out
+    (but at least MIN_REPEATS), then runs it once more under tracemalloc to
+    record its peak allocation. setup runs untimed before every call.
+    """
+    samples = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    while len(samples) < repeats and (len(samples) < MIN_REPEATS or time.perf_counter() < deadline):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(name, size, samples, peak_bytes)
+
+async def bench_async(name: str, size: int, fn: Callable[[], Awaitable[object]], repeats: int,
+                      setup: Optional[Callable[[], Awaitable[None]]] = None) -> Dict:
+    """bench() for coroutines"""
+    samples = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    while len(samples) < repeats and (len(samples) < MIN_REPEATS or time.perf_counter() < deadline):
+        if setup is not None:
+            await setup()
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    if setup is not None:
+        await setup()
+    tracemalloc.start()
+    try:
+        await fn()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(name, size, samples, peak_bytes)
+
+def engine_benchmarks(size: int, repeats: int) -> List[Dict]:
+    labels, columns = generate_periods(size)
+    results = []
+
+    def fresh_engine():
+        nonlocal engine
+        engine = ROIEngine()
+    engine = ROIEngine()
+    results.append(bench("engine.add_columns", size, lambda: engine.add_columns(labels, columns),
+                         repeats, setup=fresh_engine))
+
+    engine = ROIEngine()
+    engine.add_columns(labels, columns)
+    period = TransactionPeriod(labels[-1], *(columns[name][-1].item() for name in
+                                             ("cc_volume", "cc_count", "ach_volume", "ach_count",
+                                              "cc_rate", "conv_fee")))
+    results.append(bench("engine.add_period", size, lambda: engine.add_period(period), repeats))
+
+    # Fix the visible window at size, so later appends do not change it
+    cold = lambda: drop_caches(engine)
+    results.append(bench("engine.snapshot", size, lambda: engine.snapshot(size), repeats, setup=cold))
+    results.append(bench("engine.calculate_roi", size, lambda: engine.calculate_roi(size), repeats, setup=cold))
+    results.append(bench("engine.calculate_roi.cached", size, lambda: engine.calculate_roi(size), repeats))
+    results.append(bench("engine.get_alerts", size, lambda: engine.get_alerts(size), repeats, setup=cold))
+    results.append(bench("engine.analyze_roi_trajectory", size,
+                         lambda: engine.analyze_roi_trajectory(size), repeats, setup=cold))
+    results.append(bench("engine.project_roi", size, lambda: engine.project_roi(12, size), repeats, setup=cold))
+    return results
+
+async def api_benchmarks(sizes: List[int], ingest_sizes: List[int], repeats: int) -> List[Dict]:
+    """Times the API end to end through an in-process ASGI client."""
+    import httpx
+    import api
+
+    results = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for size in sizes:
+            labels, columns = generate_periods(size)
+            tenant = api.registry.get(f"bench-{size}")
+            tenant.engine.add_columns(labels, columns)
+            tenant.current_period = size
+            url = f"/tenants/bench-{size}/roi"
+
+            async def get_roi():
+                response = await client.get(url)
+                response.raise_for_status()
+                return response
+
+            async def cold():
+                drop_caches(tenant.engine)
+            results.append(await bench_async("api.roi", size, get_roi, repeats, setup=cold))
+            results.append(await bench_async("api.roi.cached", size, get_roi, repeats))
+            etag = (await get_roi()).headers["etag"]
+
+            async def revalidate():
+                response = await client.get(url, headers={"If-None-Match": etag})
+                assert response.status_code == 304
+            results.append(await bench_async("api.roi.not_modified", size, revalidate, repeats))
+            api.registry.evict(tenant.tenant_id)
+
+        for size in ingest_sizes:
+            body = ndjson_body(*generate_periods(size))
+            url = f"/tenants/ingest-{size}/periods/batch"
+
+            async def ingest():
+                response = await client.post(url, content=body, headers={"Content-Type": "application/x-ndjson"})
+                response.raise_for_status()
+                assert response.json()["added"] == size
+
+            async def empty():
+                (await client.delete(f"/tenants/ingest-{size}/periods")).raise_for_status()
+            results.append(await bench_async("api.periods_batch", size, ingest, repeats, setup=empty))
+            api.registry.evict(f"ingest-{size}")
+    return results
+
+STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+import api
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+TestClient(api.app).get("/health").raise_for_status()
+print(imported - start, time.perf_counter() - start)
+"""
+
+def startup_benchmarks(data_dir: str) -> List[Dict]:
+    """Times importing the API module, and serving a first request, in fresh interpreters."""
+    imports, startups = [], []
+    env = dict(os.environ, ROI_DATA_DIR=data_dir)
+    for _ in range(STARTUP_RUNS):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=BACKEND_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        imported, started = (float(value) for value in output.split())
+        imports.append(imported)
+        startups.append(started)
+    return [summarize("startup.import_api", 0, imports, 0),
+            summarize("startup.first_request", 0, startups, 0)]
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compares p50 latency and peak memory of every benchmark present in both
+    runs, printing a table. Returns the benchmarks that regressed by more
+    than threshold.
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'benchmark':<36}{'size':>9}{'p50 before':>13}{'p50 now':>11}{'change':>9}{'peak change':>13}")
+    for result in current["results"]:
+        key = (result["name"], result["size"])
+        if key not in previous:
+            continue
+        before = previous[key]
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        peak_change = result["peak_bytes"] / before["peak_bytes"] - 1 if before["peak_bytes"] else 0.0
+        flags = []
+        if change > threshold:
+            flags.append("time")
+        if peak_change > threshold:
+            flags.append("memory")
+        if flags:
+            regressions.append(f"{result['name']} (n={result['size']}): {' and '.join(flags)}")
+        print(f"{result['name']:<36}{result['size']:>9}{before['p50_ms']:>11.3f}ms{result['p50_ms']:>9.3f}ms"
+              f"{change:>+9.1%}{peak_change:>+13.1%}{'  REGRESSION' if flags else ''}")
+    return regressions
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(float(size)) for size in value.split(",") if size]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ROIEngine and the API on synthetic data")
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"Comma-separated period counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--api-max-size", type=int, default=100_000,
+                        help="Largest size timed through the API; /roi bodies grow with the period count")
+    parser.add_argument("--ingest-max-size", type=int, default=100_000,
+                        help="Largest size timed through POST /periods/batch")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help=f"Samples per benchmark, within a {TIME_BUDGET:.0f}s budget each")
+    parser.add_argument("--skip-api", action="store_true", help="Only time the engine")
+    parser.add_argument("--output", help="File to save the results to, as a JSON baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown or memory growth flagged as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    # The API keeps period logs on disk; keep them out of the real data directory
+    data_dir = tempfile.mkdtemp(prefix="roi-benchmark-")
+    os.environ["ROI_DATA_DIR"] = data_dir
+    try:
+        results = []
+        if not args.skip_api:
+            results.extend(startup_benchmarks(data_dir))
+        for size in args.sizes:
+            print(f"Timing the engine with {size} periods...", file=sys.stderr)
+            results.extend(engine_benchmarks(size, args.repeats))
+        if not args.skip_api:
+            print("Timing the API...", file=sys.stderr)
+            results.extend(asyncio.run(api_benchmarks(
+                [size for size in args.sizes if size <= args.api_max_size],
+                [size for size in args.sizes if size <= args.ingest_max_size],
+                args.repeats,
+            )))
+    finally:
+        if "api" in sys.modules:
+            sys.modules["api"].registry.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "sizes": args.sizes,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions beyond {args.threshold:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions", file=sys.stderr)
+    else:
+        print(f"{'benchmark':<36}{'size':>9}{'p50':>11}{'p90':>11}{'p99':>11}{'peak':>12}")
+        for r in results:
+            print(f"{r['name']:<36}{r['size']:>9}{r['p50_ms']:>9.3f}ms{r['p90_ms']:>9.3f}ms"
+                  f"{r['p99_ms']:>9.3f}ms{r['peak_bytes'] / 1024:>10.0f}KB")
+
+if __name__ == "__main__":
+    main()
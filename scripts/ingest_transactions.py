@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from load_data import CC_RATE, CONV_FEE
+from transactions import CHUNK_ROWS, FREQUENCIES, IngestResult, aggregate_transactions
+
+def iter_ndjson(result: IngestResult):
+    """One NDJSON line per aggregated period, in the /periods/batch format"""
+    columns = {name: values.tolist() for name, values in result.columns.items()}
+    for i, label in enumerate(result.labels):
+        yield json.dumps({"period": label, **{name: values[i] for name, values in columns.items()}}) + "\n"
+
+def post_periods(result: IngestResult, api_url: str, tenant: str, replace: bool) -> dict:
+    import requests
+
+    base_url = f"{api_url.rstrip('/')}/tenants/{tenant}" if tenant else api_url.rstrip("/")
+    session = requests.Session()
+    if replace:
+        session.delete(f"{base_url}/periods").raise_for_status()
+    response = session.post(f"{base_url}/periods/batch",
+                            data=(line.encode("utf-8") for line in iter_ndjson(result)),
+                            headers={"Content-Type": "application/x-ndjson"})
+    response.raise_for_status()
+    return response.json()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Aggregate a CSV or Parquet file of individual payments into ROI periods. "
+                    "Reading Parquet (and faster CSV reading) requires pyarrow.")
+    parser.add_argument("path", help="Payments file, one row per payment")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="File format (default: from the file extension)")
+    periods = parser.add_mutually_exclusive_group(required=True)
+    periods.add_argument("--period-column", help="Column holding each payment's period label")
+    periods.add_argument("--date-column", help="Column holding each payment's date, bucketed by --frequency")
+    parser.add_argument("--frequency", choices=list(FREQUENCIES), default="month")
+    parser.add_argument("--method-column", default="method",
+                        help="Column holding the payment method, e.g. cc or ach")
+    parser.add_argument("--amount-column", default="amount", help="Column holding the payment amount")
+    parser.add_argument("--cc-rate", type=float, default=CC_RATE)
+    parser.add_argument("--conv-fee", type=float, default=CONV_FEE)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Payments read per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Threads aggregating chunks")
+    parser.add_argument("--output", help="File to write NDJSON periods to (default: stdout)")
+    parser.add_argument("--api-url", help="Post the periods to this API's /periods/batch instead")
+    parser.add_argument("--tenant", help="Tenant to load the periods into (with --api-url)")
+    parser.add_argument("--replace", action="store_true",
+                        help="Delete the tenant's existing periods first (with --api-url)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = aggregate_transactions(
+        args.path, args.cc_rate, args.conv_fee,
+        period_column=args.period_column, date_column=args.date_column, frequency=args.frequency,
+        method_column=args.method_column, amount_column=args.amount_column,
+        chunk_rows=args.chunk_rows, workers=args.workers, file_format=args.format,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Aggregated {result.rows} payments ({result.skipped} skipped) into {len(result.labels)} periods "
+          f"in {elapsed:.2f}s ({result.rows / max(elapsed, 1e-9) / 1e6:.2f}M rows/s)", file=sys.stderr)
+
+    if args.api_url:
+        response = post_periods(result, args.api_url, args.tenant, args.replace)
+        print(f"Loaded {response['added']} periods ({response['error_count']} errors)", file=sys.stderr)
+    elif args.output:
+        with open(args.output, "w") as f:
+            f.writelines(iter_ndjson(result))
+    else:
+        sys.stdout.writelines(iter_ndjson(result))
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+import json
 import requests
 import time
 from typing import Dict, List
@@ -64,12 +66,12 @@ data = [
 # ]
 # data = test_negative_data
 
-def wait_for_backend(url: str, max_retries: int = 30, delay: int = 2) -> bool:
+def wait_for_backend(session: requests.Session, url: str, max_retries: int = 30, delay: int = 2) -> bool:
     """Wait for backend to become available"""
     print("Waiting for backend to become available...")
     for i in range(max_retries):
         try:
-            response = requests.get(f"{url}/health")
+            response = session.get(f"{url}/health")
             if response.status_code == 200:
                 print("Backend is ready!")
                 return True
@@ -78,10 +80,10 @@ def wait_for_backend(url: str, max_retries: int = 30, delay: int = 2) -> bool:
             time.sleep(delay)
     return False
 
-def delete_all_periods(base_url: str) -> bool:
+def delete_all_periods(session: requests.Session, base_url: str) -> bool:
     """Delete all existing periods from the API"""
     try:
-        response = requests.delete(f"{base_url}/periods")
+        response = session.delete(f"{base_url}/periods")
         if response.status_code == 200:
             print("Successfully deleted all existing periods")
             return True
@@ -92,41 +94,72 @@ def delete_all_periods(base_url: str) -> bool:
         print(f"Error deleting periods: {str(e)}")
         return False
 
-def load_data(base_url: str = "http://backend:8000") -> None:
-    """Load sample transaction data into the ROI tracking API"""
-    if not wait_for_backend(base_url):
+def count_periods(session: requests.Session, base_url: str) -> int:
+    """Number of periods the API holds; a sweep with no grids covers every stored period"""
+    response = session.post(f"{base_url}/roi/scenarios", json={})
+    response.raise_for_status()
+    return response.json()["periods"]
+
+def load_data(base_url: str = "http://backend:8000", reset: bool = False) -> None:
+    """
+    Load sample transaction data into the ROI tracking API. Periods are kept
+    on disk across restarts, so by default this only seeds an empty API;
+    with reset it deletes the existing periods and reloads the sample.
+    """
+    session = requests.Session()
+    if not wait_for_backend(session, base_url):
         print("Backend failed to become available")
         return
 
-    # Delete existing periods first
-    print("\nDeleting existing periods...")
-    if not delete_all_periods(base_url):
-        print("Failed to delete existing periods. Proceeding with data load anyway...")
+    if not reset:
+        try:
+            existing = count_periods(session, base_url)
+        except Exception as e:
+            print(f"Could not count existing periods, not loading sample data: {str(e)}")
+            return
+        if existing:
+            print(f"API already holds {existing} periods; not loading sample data")
+            return
+    else:
+        # Delete existing periods first
+        print("\nDeleting existing periods...")
+        if not delete_all_periods(session, base_url):
+            print("Failed to delete existing periods. Proceeding with data load anyway...")
 
-    api_url = f"{base_url}/period"
+    api_url = f"{base_url}/periods/batch"
     success_count = 0
-    error_count = 0
+    error_count = len(data)
 
     print("\nStarting to load transaction data...")
     
     for period in data:
         period["ach_count"] = int(period.get("ach_volume") / AVG_ACH_TX_AMOUNT)
         period["cc_count"] = int(period.get("cc_volume") / AVG_CC_TX_AMOUNT)
-        try:
-            response = requests.post(api_url, json=period)
-            if response.status_code == 200:
-                print(f"Successfully loaded period {period['period']}")
-                success_count += 1
-            else:
-                print(f"Failed to load period {period['period']}: {response.text}")
-                error_count += 1
-        except Exception as e:
-            print(f"Error loading period {period['period']}: {str(e)}")
-            error_count += 1
+
+    # Send every period in one NDJSON request
+    body = "\n".join(json.dumps(period) for period in data)
+    try:
+        response = session.post(api_url, data=body.encode("utf-8"),
+                                headers={"Content-Type": "application/x-ndjson"})
+        if response.status_code == 200:
+            result = response.json()
+            success_count = result["added"]
+            error_count = result["error_count"]
+            for error in result["errors"]:
+                print(f"Failed to load period {data[error['row'] - 1]['period']}: {error['error']}")
+        else:
+            print(f"Failed to load periods: {response.text}")
+    except Exception as e:
+        print(f"Error loading periods: {str(e)}")
     
     print(f"\nData loading complete:")
     print(f"Successfully loaded: {success_count} periods")
     print(f"Failed to load: {error_count} periods")
 
 if __name__ == "__main__":
-    load_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the sample periods into the ROI tracking API")
+    parser.add_argument("--url", default="http://backend:8000", help="API base URL")
+    parser.add_argument("--reset", action="store_true",
+                        help="Delete existing periods and reload the sample even if the API holds data")
+    args = parser.parse_args()
+    load_data(args.url, args.reset) 
\ No newline at end of file
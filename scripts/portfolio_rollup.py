@@ -0,0 +1,58 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from period_log import read_live_records
+from period_store import PeriodStore
+from portfolio import PortfolioSummary, compute_portfolio
+
+def load_period_sets(data_dir: str) -> dict:
+    """Memory-maps every tenant's period log in data_dir, read-only"""
+    period_sets = {}
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".log"):
+            continue
+        records = read_live_records(os.path.join(data_dir, name))
+        period_sets[name[:-len(".log")]] = {column: records[column] for column in PeriodStore.COLUMNS}
+    return period_sets
+
+def write_summary(summary: PortfolioSummary, output, output_format: str) -> None:
+    rows = summary.rows()
+    if output_format == "json":
+        json.dump(rows, output, indent=2)
+        output.write("\n")
+        return
+    writer = csv.DictWriter(output, fieldnames=["tenant_id", *PortfolioSummary.FIELDS])
+    writer.writeheader()
+    writer.writerows(rows)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute an ROI rollup for every tenant in the portfolio")
+    parser.add_argument("--data-dir", default=os.environ.get("ROI_DATA_DIR", "data"),
+                        help="Directory holding the tenants' period logs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes to fan out across")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", help="File to write the summary table to (default: stdout)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    period_sets = load_period_sets(args.data_dir)
+    summary = compute_portfolio(period_sets, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_summary(summary, f, args.format)
+    else:
+        write_summary(summary, sys.stdout, args.format)
+    print(f"Summarized {len(period_sets)} tenants ({int(summary.periods.sum())} periods) "
+          f"in {elapsed:.2f}s with {args.workers} workers", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
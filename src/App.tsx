@@ -27,6 +27,7 @@ ChartJS.register(
 );
 
 interface Alert {
+  rule_id: string;
   type: 'success' | 'info' | 'warning' | 'error';
   message: string;
   timestamp: string;
@@ -50,6 +51,26 @@ interface ROIData {
   raw_numbers: RawNumbers;
 }
 
+interface ForecastLine {
+  slope: number | null;
+  intercept: number | null;
+  break_even_period: number | null;
+}
+
+interface ROISnapshotEvent {
+  results: ROIData[];
+  alerts: Alert[];
+  forecast: ForecastLine;
+  current_period: number;
+}
+
+interface ROIDeltaEvent {
+  rows?: ROIData[];
+  alerts?: Alert[];
+  forecast?: ForecastLine;
+  current_period: number;
+}
+
 declare global {
   interface Window {
     env: {
@@ -67,6 +88,15 @@ const formatCurrency = (value: number): string => {
   }).format(value);
 };
 
+// Re-derive every row's forecast from the updated trend line
+const applyForecast = (rows: ROIData[], forecast: ForecastLine): ROIData[] => {
+  const { slope, intercept } = forecast;
+  if (slope === null || intercept === null) {
+    return rows;
+  }
+  return rows.map((row, index) => ({ ...row, forecast: intercept + slope * index }));
+};
+
 const App: React.FC = () => {
   const [roiData, setRoiData] = useState<ROIData[]>([]);
   const [alerts, setAlerts] = useState<Alert[]>([]);
@@ -99,8 +129,6 @@ const App: React.FC = () => {
         method: 'POST'
       });
       setCurrentPeriod(0);
-      setRoiData([]);
-      setAlerts([]);
       setSelectedPeriod(null);
       startLoadingPeriods();
     } catch (error) {
@@ -108,29 +136,6 @@ const App: React.FC = () => {
     }
   };
 
-  const fetchData = async () => {
-    try {
-      const apiUrl = window.env?.REACT_APP_API_URL || 'http://localhost:8000';
-      const response = await fetch(`${apiUrl}/roi`);
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      const data = await response.json();
-      setRoiData(data.results);
-      setAlerts(data.alerts);
-      setCurrentPeriod(data.current_period);
-      if (data.results.length > 0) {
-        setSelectedPeriod(data.results[data.results.length - 1]);
-      }
-      setError(null);
-      return data.current_period;
-    } catch (error) {
-      console.error('Error fetching ROI data:', error);
-      setError('Failed to fetch ROI data. Please check the console for details.');
-      return null;
-    }
-  };
-
   const startLoadingPeriods = async () => {
     setIsLoading(true);
     let keepLoading = true;
@@ -141,7 +146,7 @@ const App: React.FC = () => {
       if (nextPeriod === null || nextPeriod === lastPeriod) {
         keepLoading = false;
       } else {
-        await fetchData();
+        // The new period's data arrives through the /roi/stream subscription
         lastPeriod = nextPeriod;
         await new Promise(resolve => setTimeout(resolve, 10000)); // 10 second delay
       }
@@ -151,9 +156,44 @@ const App: React.FC = () => {
   };
 
   useEffect(() => {
+    const apiUrl = window.env?.REACT_APP_API_URL || 'http://localhost:8000';
+    const source = new EventSource(`${apiUrl}/roi/stream`);
+
+    source.addEventListener('snapshot', (event: MessageEvent) => {
+      const data: ROISnapshotEvent = JSON.parse(event.data);
+      setRoiData(data.results);
+      setAlerts(data.alerts);
+      setCurrentPeriod(data.current_period);
+      setSelectedPeriod(data.results.length > 0 ? data.results[data.results.length - 1] : null);
+      setError(null);
+    });
+
+    source.addEventListener('delta', (event: MessageEvent) => {
+      const data: ROIDeltaEvent = JSON.parse(event.data);
+      if (data.rows || data.forecast) {
+        setRoiData(previous => {
+          let rows = data.rows ? [...previous, ...data.rows] : previous;
+          if (data.forecast) {
+            rows = applyForecast(rows, data.forecast);
+          }
+          setSelectedPeriod(rows.length > 0 ? rows[rows.length - 1] : null);
+          return rows;
+        });
+      }
+      if (data.alerts) {
+        setAlerts(data.alerts);
+      }
+      setCurrentPeriod(data.current_period);
+      setError(null);
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects on its own and receives a fresh snapshot
+      setError('Lost connection to the ROI stream. Reconnecting...');
+    };
+
     startLoadingPeriods();
-    // No interval needed anymore since we're using manual progression
-    return () => {};
+    return () => source.close();
   }, []);
 
   const chartData: ChartData<'line'> = {
@@ -288,9 +328,9 @@ const App: React.FC = () => {
       
       {/* Alerts Section */}
       <div style={{ marginBottom: '20px' }}>
-        {alerts.map((alert, index) => (
+        {alerts.map((alert) => (
           <div
-            key={index}
+            key={alert.rule_id}
             style={{
               padding: '12px 16px',
               marginBottom: '8px',
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Backend modules import each other by bare name, as they do when the app runs from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+# Importing api opens tenant storage; keep it out of the working tree
+os.environ.setdefault("ROI_DATA_DIR", tempfile.mkdtemp(prefix="roi-test-data-"))
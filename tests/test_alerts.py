@@ -0,0 +1,113 @@
+import json
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+from alerts import AlertLog, AlertTracker
+from montecarlo import BreakEvenForecast
+from roi_engine import ROIEngine, TransactionPeriod
+from tenants import EngineStorage
+
+def make_engine(periods: int) -> ROIEngine:
+    engine = ROIEngine()
+    engine.add_periods([
+        TransactionPeriod(period=f"P{i}", cc_volume=900000.0 + 1000 * i, cc_count=10,
+                          ach_volume=50000.0, ach_count=20, cc_rate=2.9, conv_fee=1.0)
+        for i in range(periods)
+    ])
+    return engine
+
+def test_get_alerts_leaves_the_tracker_unchanged():
+    engine = make_engine(5)
+    alerts = engine.get_alerts(3)
+    assert alerts and all(alert["timestamp"] for alert in alerts)
+    assert engine.alert_tracker.last_seq == 0 and engine.alert_tracker.active() == []
+
+def test_get_alerts_keeps_timestamps_of_active_rules():
+    engine = make_engine(5)
+    active = engine.alert_tracker.evaluate(engine.snapshot(3))
+    fired_at = {alert["rule_id"]: alert["timestamp"] for alert in active}
+    last_seq = engine.alert_tracker.last_seq
+    for alert in engine.get_alerts(3):
+        assert alert["timestamp"] == fired_at[alert["rule_id"]]
+    assert engine.alert_tracker.last_seq == last_seq
+
+def test_forecast_alert_keeps_its_timestamp_while_its_type_holds():
+    engine = make_engine(5)
+    forecast = BreakEvenForecast(paths=100, horizon=24, target_periods=12, observed_periods=5,
+                                 mean_period_savings=1.0, std_period_savings=0.0, probability_within_target=0.5,
+                                 probability_within_horizon=1.0, p10=4, p50=8, p90=14)
+    fired, = engine.forecast_alerts(forecast)
+    again, = engine.forecast_alerts(replace(forecast, probability_within_target=0.6))
+    assert again["type"] == fired["type"] and again["timestamp"] == fired["timestamp"]
+    assert again["message"] != fired["message"]
+    time.sleep(0.001)
+    low, = engine.forecast_alerts(replace(forecast, probability_within_target=0.1))
+    assert low["type"] == "warning" and low["timestamp"] != fired["timestamp"]
+
+def rule_snapshot(version: int, *rule_ids: str) -> SimpleNamespace:
+    alerts = tuple({"rule_id": rule_id, "type": "info", "message": f"{rule_id} at {version}"} for rule_id in rule_ids)
+    return SimpleNamespace(version=version, visible_periods=version, alerts=alerts)
+
+def test_journal_survives_a_crash(tmp_path):
+    path = str(tmp_path / "tenant.alerts")
+    tracker = AlertTracker.open(path)
+    tracker.evaluate(rule_snapshot(1, "a", "b"))
+    tracker.evaluate(rule_snapshot(2, "b"))
+    # No close(): as if the process died here
+    restored = AlertTracker.open(path)
+    assert restored.last_seq == 3
+    assert [e["event"] for e in restored.events()[0]] == ["fired", "fired", "resolved"]
+    assert restored.active() == tracker.active()
+    # Still firing after the restart, so nothing is reported again
+    restored.evaluate(rule_snapshot(3, "b"))
+    assert restored.last_seq == 3
+    restored.close()
+
+def test_journal_ignores_a_torn_trailing_line(tmp_path):
+    path = str(tmp_path / "tenant.alerts")
+    tracker = AlertTracker.open(path)
+    tracker.evaluate(rule_snapshot(1, "a"))
+    with open(path, "a") as f:
+        f.write('{"transitions": [{"seq": 2, "ev')
+    restored = AlertTracker.open(path)
+    assert restored.last_seq == 1
+    restored.evaluate(rule_snapshot(2))
+    restored.close()
+    assert AlertTracker.open(path).last_seq == 2
+
+def test_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(AlertLog, "COMPACT_LINES", 5)
+    path = str(tmp_path / "tenant.alerts")
+    tracker = AlertTracker.open(path)
+    for version in range(1, 30):
+        tracker.evaluate(rule_snapshot(version, "a") if version % 2 else rule_snapshot(version))
+        with open(path) as f:
+            assert len(f.readlines()) <= 6
+    restored = AlertTracker.open(path)
+    assert restored.last_seq == tracker.last_seq == 29
+    assert restored.events(25)[0] == tracker.events(25)[0]
+
+def test_saved_tracker_file_opens_as_a_journal(tmp_path):
+    tracker = AlertTracker()
+    tracker.evaluate(rule_snapshot(1, "a"))
+    path = str(tmp_path / "tenant.alerts")
+    with open(path, "w") as f:
+        json.dump(tracker.to_dict(), f)
+    assert AlertTracker.open(path).to_dict() == tracker.to_dict()
+
+def test_load_matches_alerts_to_the_saved_cursor(tmp_path):
+    storage = EngineStorage(str(tmp_path))
+    state = storage.load("t")
+    engine = make_engine(30)
+    state.engine.add_periods(engine.periods)
+    state.current_period = 30
+    state.engine.alert_tracker.evaluate(state.engine.snapshot(30))
+    # Crash: the journal has the alerts for period 30, but the cursor was never saved
+    state.engine.log.close()
+    state.engine.alert_tracker.close()
+
+    reloaded = storage.load("t")
+    assert reloaded.current_period == 0
+    expected = {alert["rule_id"] for alert in reloaded.engine.snapshot(0).alerts}
+    assert {alert["rule_id"] for alert in reloaded.engine.alert_tracker.active()} == expected
+    storage.save(reloaded)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import api
+from api import ResponseCache
+from roi_engine import TransactionPeriod
+from tenants import EngineRegistry, EngineStorage
+
+def response(size: int, etag: str = '"e"'):
+    return etag, b"x" * size
+
+def test_response_cache_is_bounded_by_body_bytes():
+    cache = ResponseCache(max_bytes=250)
+    cache.put(("a", 1, 0, 0), response(100))
+    cache.put(("b", 1, 0, 0), response(100))
+    assert cache.get(("a", 1, 0, 0)) is not None
+    # Evicts b, the least recently used, to make room
+    cache.put(("c", 1, 0, 0), response(100))
+    assert cache.get(("b", 1, 0, 0)) is None
+    assert len(cache) == 2 and cache.nbytes == 200
+
+def test_response_cache_skips_bodies_over_budget():
+    cache = ResponseCache(max_bytes=100)
+    cache.put(("a", 1, 0, 0), response(50))
+    cache.put(("a", 1, 1, 0), response(101))
+    assert cache.get(("a", 1, 1, 0)) is None
+    assert cache.get(("a", 1, 0, 0)) is not None
+
+def test_response_cache_drops_older_versions_of_a_tenant():
+    cache = ResponseCache(max_bytes=10_000)
+    cache.put(("a", 1, 0, 0), response(10))
+    cache.put(("a", 1, 1, 0), response(10))
+    cache.put(("b", 1, 0, 0), response(10))
+    cache.put(("a", 2, 0, 0), response(10))
+    assert cache.get(("a", 1, 0, 0)) is None and cache.get(("a", 1, 1, 0)) is None
+    assert cache.get(("b", 1, 0, 0)) is not None
+    # A newer alert transition supersedes the same data version too
+    cache.put(("a", 2, 0, 1), response(10))
+    assert cache.get(("a", 2, 0, 0)) is None
+    assert cache.nbytes == 20
+
+def test_response_cache_ignores_responses_older_than_cached_ones():
+    cache = ResponseCache(max_bytes=10_000)
+    cache.put(("a", 3, 0, 0), response(10))
+    # An encode for an earlier version finishing late
+    cache.put(("a", 2, 0, 0), response(10))
+    assert cache.get(("a", 2, 0, 0)) is None
+    assert cache.get(("a", 3, 0, 0)) is not None
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+def make_period(i: int) -> TransactionPeriod:
+    return TransactionPeriod(period=f"P{i}", cc_volume=100000.0 + i, cc_count=100,
+                             ach_volume=50000.0, ach_count=50, cc_rate=2.9, conv_fee=1.0)
+
+def test_stream_watchers_over_budget_do_not_reload_each_other(tmp_path, monkeypatch):
+    # Every tenant exceeds the budget, so loading one evicts all the others
+    registry = EngineRegistry(EngineStorage(str(tmp_path)), memory_budget=1)
+    monkeypatch.setattr(api, "registry", registry)
+    loads = []
+    load = registry.storage.load
+    monkeypatch.setattr(registry.storage, "load", lambda tenant_id: loads.append(tenant_id) or load(tenant_id))
+    tenant_ids = ["a", "b", "c"]
+
+    async def watch(request, tenant_id, events):
+        response = await api.stream_roi(request, tenant_id=tenant_id)
+        async for event in response.body_iterator:
+            events.append(event)
+
+    async def run():
+        for tenant_id in tenant_ids:
+            registry.get(tenant_id).engine.add_period(make_period(0))
+        requests = {tenant_id: FakeRequest() for tenant_id in tenant_ids}
+        events = {tenant_id: [] for tenant_id in tenant_ids}
+        tasks = [asyncio.ensure_future(watch(requests[t], t, events[t])) for t in tenant_ids]
+        await asyncio.sleep(0.3)
+        # Each watcher loaded its tenant once to send the snapshot, then went idle
+        assert len(loads) <= 2 * len(tenant_ids)
+        settled = len(loads)
+        await asyncio.sleep(0.3)
+        assert len(loads) == settled
+        assert all(events[t] and events[t][0].startswith("event: snapshot") for t in tenant_ids)
+
+        # A write to an evicted tenant wakes its watcher with the new data
+        sent = len(events["a"])
+        tenant = registry.get("a")
+        tenant.engine.add_period(make_period(1))
+        tenant.current_period = 2
+        api._notify_changed(tenant)
+        await asyncio.sleep(0.3)
+        assert len(events["a"]) > sent and '"current_period": 2' in events["a"][-1]
+
+        for tenant_id in tenant_ids:
+            requests[tenant_id].disconnected = True
+        for tenant_id in tenant_ids:
+            registry.get(tenant_id).notify_changed()
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+
+    asyncio.run(run())
+
+def test_concurrent_writes_over_budget_keep_every_period(tmp_path, monkeypatch):
+    registry = EngineRegistry(EngineStorage(str(tmp_path)), memory_budget=1, executor=api.compute_pool)
+    monkeypatch.setattr(api, "registry", registry)
+    load_threads = set()
+    load = registry.storage.load
+    def tracked_load(tenant_id):
+        load_threads.add(threading.current_thread().name)
+        return load(tenant_id)
+    monkeypatch.setattr(registry.storage, "load", tracked_load)
+    tenant_ids = ["a", "b", "c"]
+
+    async def run():
+        # Each write evicts the other tenants, so loads and saves interleave with writes
+        await asyncio.gather(*(
+            api.add_period(api.PeriodData(**make_period(i).__dict__), tenant_id=tenant_id)
+            for i in range(20) for tenant_id in tenant_ids
+        ))
+
+    asyncio.run(run())
+    assert load_threads and all(name.startswith("roi-compute") for name in load_threads)
+    registry.close()
+    reloaded = EngineRegistry(EngineStorage(str(tmp_path)))
+    for tenant_id in tenant_ids:
+        assert reloaded.get(tenant_id).engine.period_count == 20
+    reloaded.close()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from forecaster import StreamingForecaster
+
+def polyfit_line(ys: np.ndarray):
+    slope, intercept = np.polyfit(np.arange(len(ys), dtype=float), ys, 1)
+    return slope, intercept
+
+@pytest.fixture
+def series() -> np.ndarray:
+    rng = np.random.default_rng(7)
+    # ROI-like: starts at minus the subscription cost and trends upward with noise
+    return -170000 + np.cumsum(rng.normal(9000, 4000, 200))
+
+def test_fit_matches_polyfit_for_every_prefix(series):
+    forecaster = StreamingForecaster()
+    forecaster.extend(series)
+    for n in range(2, len(series) + 1):
+        slope, intercept = forecaster.fit(n)
+        expected_slope, expected_intercept = polyfit_line(series[:n])
+        assert slope == pytest.approx(expected_slope, rel=1e-9, abs=1e-6)
+        assert intercept == pytest.approx(expected_intercept, rel=1e-9, abs=1e-6)
+
+def test_predict_matches_polyfit(series):
+    forecaster = StreamingForecaster()
+    forecaster.extend(series)
+    for n in (2, 3, 10, 57, len(series)):
+        slope, intercept = polyfit_line(series[:n])
+        expected = intercept + slope * np.arange(n)
+        np.testing.assert_allclose(forecaster.predict(n), expected, rtol=1e-9, atol=1e-6)
+
+def test_break_even_period_matches_polyfit_line(series):
+    forecaster = StreamingForecaster()
+    forecaster.extend(series)
+    for n in range(2, len(series) + 1):
+        slope, intercept = polyfit_line(series[:n])
+        if intercept >= 0:
+            expected = 0
+        elif slope <= 0:
+            expected = None
+        else:
+            expected = int(np.ceil(-intercept / slope))
+        assert forecaster.break_even_period(n) == expected
+
+def test_append_and_extend_agree(series):
+    appended, extended = StreamingForecaster(), StreamingForecaster()
+    for y in series:
+        appended.append(y)
+    extended.extend(series[:50])
+    extended.extend(series[50:])
+    assert appended.fit() == pytest.approx(extended.fit(), rel=1e-12)
+
+def test_frozen_copy_ignores_later_points(series):
+    forecaster = StreamingForecaster()
+    forecaster.extend(series[:20])
+    frozen = forecaster.frozen()
+    forecaster.extend(series[20:])
+    assert len(frozen) == 20
+    assert frozen.fit() == pytest.approx(polyfit_line(series[:20]), rel=1e-9)
+
+@pytest.mark.parametrize("points", [0, 1])
+def test_fewer_than_two_points_has_no_fit(points):
+    forecaster = StreamingForecaster()
+    forecaster.extend([-170000.0] * points)
+    assert forecaster.fit() is None
+    assert forecaster.predict() is None
+    assert forecaster.project(5) is None
+    assert forecaster.break_even_period() is None
+
+def test_prefix_longer_than_series_has_no_fit(series):
+    forecaster = StreamingForecaster()
+    forecaster.extend(series[:5])
+    assert forecaster.fit(6) is None
+    assert forecaster.fit(1) is None
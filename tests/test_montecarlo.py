@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import montecarlo
+from montecarlo import forecast_break_even, simulate_periods_to_roi
+
+def test_constant_savings_give_one_outcome():
+    forecast = forecast_break_even(np.full(6, 100.0), current_roi=-250, target_periods=3, horizon=10, paths=1000)
+    assert (forecast.p10, forecast.p50, forecast.p90) == (3, 3, 3)
+    assert forecast.probability_within_target == 1
+    assert forecast.std_period_savings == 0
+
+def test_two_value_bootstrap_percentiles():
+    # Two draws break even unless both are 400 (1 in 4), which takes a third
+    forecast = forecast_break_even(np.array([400.0, 600.0]), current_roi=-1000, target_periods=2, horizon=10,
+                                   paths=20000, seed=3)
+    assert (forecast.p10, forecast.p50, forecast.p90) == (2, 2, 3)
+    assert forecast.probability_within_target == pytest.approx(0.75, abs=0.02)
+    assert forecast.probability_within_horizon == 1
+
+def test_paths_crossing_time_blocks(monkeypatch):
+    monkeypatch.setattr(montecarlo, "TIME_BLOCK", 3)
+    monkeypatch.setattr(montecarlo, "BLOCK_CELLS", 30)
+    periods = simulate_periods_to_roi(np.array([100.0]), current_roi=-700, horizon=20, paths=50)
+    assert periods.tolist() == [7] * 50
+
+def test_declining_savings_never_break_even():
+    forecast = forecast_break_even(np.array([-50.0, 10.0]), current_roi=-1000, target_periods=12, horizon=24,
+                                   paths=500)
+    assert (forecast.p10, forecast.p50, forecast.p90) == (None, None, None)
+    assert forecast.probability_within_target == 0
+
+def test_break_even_already_reached():
+    periods = simulate_periods_to_roi(np.array([-5.0, 5.0]), current_roi=10, horizon=12, paths=100)
+    assert not periods.any()
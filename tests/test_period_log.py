@@ -0,0 +1,199 @@
+import os
+import time
+import numpy as np
+import pytest
+from period_log import (HEADER_SIZE, KIND_PERIOD, LEGACY_MAGIC, LEGACY_RECORD_DTYPE, RECORD_DTYPE,
+                        PeriodLog, labels_path, read_live_records)
+from period_store import PeriodStore
+from roi_engine import ROIEngine
+
+def make_columns(n: int, start: int = 0) -> dict:
+    values = np.arange(start, start + n)
+    return {
+        "cc_volume": values * 1000.5,
+        "cc_count": values * 3,
+        "ach_volume": values * 200.25,
+        "ach_count": values * 7,
+        "cc_rate": np.full(n, 2.9),
+        "conv_fee": np.full(n, 1.0),
+    }
+
+def assert_columns_equal(actual: dict, expected: dict):
+    for name in PeriodStore.COLUMNS:
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "tenant.log")
+
+def test_round_trip_survives_reopen(path):
+    labels = ["P1", "Période 2 — ünïcode", "x" * 300, ""]
+    columns = make_columns(len(labels))
+    log = PeriodLog(path)
+    log.append_columns(labels[:2], {name: c[:2] for name, c in columns.items()})
+    log.append(labels[2], {name: c[2] for name, c in columns.items()})
+    log.append_columns(labels[3:], {name: c[3:] for name, c in columns.items()})
+    assert log.read()[0] == labels
+    log.close()
+
+    reopened = PeriodLog(path)
+    read_labels, read_columns = reopened.read()
+    assert read_labels == labels
+    assert_columns_equal(read_columns, columns)
+    assert len(reopened) == len(labels)
+    reopened.close()
+
+def test_read_live_records_skips_cleared_periods(path):
+    log = PeriodLog(path)
+    log.append_columns(["a", "b", "c"], make_columns(3))
+    log.append_clear()
+    log.append_columns(["d"], make_columns(1, start=10))
+    records = read_live_records(path)
+    assert len(records) == 1 and records["cc_count"][0] == 30
+    log.close()
+
+def test_clear_compacts_once_dead_records_outnumber_live(path):
+    log = PeriodLog(path)
+    log.append_columns(["a", "b"], make_columns(2))
+    generation = log._generation
+    log.append_clear()
+    # Two periods and the tombstone are dead, nothing is live: rewritten empty
+    assert os.path.getsize(path) == HEADER_SIZE
+    assert log._generation == generation + 1
+    assert not os.path.exists(labels_path(path, generation))
+    log.append_columns(["c"], make_columns(1, start=5))
+    log.close()
+
+    reopened = PeriodLog(path)
+    labels, columns = reopened.read()
+    assert labels == ["c"]
+    assert_columns_equal(columns, make_columns(1, start=5))
+    reopened.close()
+
+def test_replace_columns_writes_tombstone_and_records_together(path):
+    log = PeriodLog(path)
+    log.append_columns(["old1", "old2", "old3"], make_columns(3))
+    log.replace_columns(["new"], make_columns(1, start=9))
+    assert log.read()[0] == ["new"]
+    log.close()
+    assert PeriodLog(path).read()[0] == ["new"]
+
+def test_reopen_compacts_dead_records(path):
+    log = PeriodLog(path)
+    log.append_columns([f"p{i}" for i in range(10)], make_columns(10))
+    # Only compacts on clear when dead records outnumber live ones
+    log.append_clear()
+    log.append_columns([f"q{i}" for i in range(20)], make_columns(20))
+    log.append_clear()
+    log.append_columns([f"r{i}" for i in range(30)], make_columns(30))
+    log.close()
+
+    reopened = PeriodLog(path)
+    assert reopened._dead == 0
+    assert reopened.read()[0] == [f"r{i}" for i in range(30)]
+    assert os.path.getsize(path) == HEADER_SIZE + 30 * RECORD_DTYPE.itemsize
+    reopened.close()
+
+def test_torn_trailing_record_is_dropped(path):
+    log = PeriodLog(path)
+    log.append_columns(["a", "b"], make_columns(2))
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (RECORD_DTYPE.itemsize // 2))
+
+    reopened = PeriodLog(path)
+    assert reopened.read()[0] == ["a", "b"]
+    assert os.path.getsize(path) == HEADER_SIZE + 2 * RECORD_DTYPE.itemsize
+    # Appends continue on a record boundary
+    reopened.append_columns(["c"], make_columns(1))
+    reopened.close()
+    assert PeriodLog(path).read()[0] == ["a", "b", "c"]
+
+def test_records_whose_labels_were_lost_are_dropped(path):
+    log = PeriodLog(path)
+    log.append_columns(["keep", "lost-1", "lost-2"], make_columns(3))
+    generation = log._generation
+    log.close()
+    # As after a machine crash that persisted the records but not all labels
+    with open(labels_path(path, generation), "r+b") as f:
+        f.truncate(len("keep") + 2)
+
+    reopened = PeriodLog(path)
+    assert reopened.read()[0] == ["keep"]
+    reopened.append_columns(["next"], make_columns(1))
+    reopened.close()
+    assert PeriodLog(path).read()[0] == ["keep", "next"]
+
+def test_stale_labels_file_from_interrupted_compaction_is_removed(path):
+    log = PeriodLog(path)
+    log.append_columns(["a"], make_columns(1))
+    generation = log._generation
+    log.close()
+    # A compaction that wrote the next labels file but crashed before replacing the log
+    with open(labels_path(path, generation + 1), "wb") as f:
+        f.write(b"garbage")
+
+    reopened = PeriodLog(path)
+    assert reopened.read()[0] == ["a"]
+    assert not os.path.exists(labels_path(path, generation + 1))
+    reopened.close()
+
+def test_legacy_log_is_migrated(path):
+    records = np.zeros(3, dtype=LEGACY_RECORD_DTYPE)
+    records["kind"] = KIND_PERIOD
+    records["label"] = [b"Period 1", b"Period 2", b"Period 3"]
+    for name, values in make_columns(3).items():
+        records[name] = values
+    with open(path, "wb") as f:
+        f.write(LEGACY_MAGIC + np.uint64(LEGACY_RECORD_DTYPE.itemsize).tobytes())
+        f.write(records.tobytes())
+    assert len(read_live_records(path)) == 3
+
+    log = PeriodLog(path)
+    labels, columns = log.read()
+    assert labels == ["Period 1", "Period 2", "Period 3"]
+    assert_columns_equal(columns, make_columns(3))
+    log.append_columns(["a much longer label than the legacy format could hold"], make_columns(1))
+    log.close()
+    assert len(PeriodLog(path).read()[0]) == 4
+
+def test_rejects_other_files(path):
+    with open(path, "wb") as f:
+        f.write(b"not a period log at all")
+    with pytest.raises(ValueError):
+        PeriodLog(path)
+
+def test_pending_appends_are_synced_by_timer(path):
+    log = PeriodLog(path, sync_every=1000, sync_interval=0.05)
+    log.append_columns(["a"], make_columns(1))
+    assert log._unsynced == 1
+    deadline = time.monotonic() + 2
+    while log._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log._unsynced == 0
+    log.close()
+
+def test_sync_every_forces_sync(path):
+    log = PeriodLog(path, sync_every=2, sync_interval=60)
+    log.append_columns(["a"], make_columns(1))
+    assert log._unsynced == 1
+    log.append_columns(["b"], make_columns(1))
+    assert log._unsynced == 0
+    log.close()
+
+def test_malformed_columns_are_not_logged(path):
+    engine = ROIEngine.from_log(PeriodLog(path))
+    # Length-1 columns would broadcast over two labels if not checked first
+    with pytest.raises(ValueError):
+        engine.add_columns(["a", "b"], make_columns(1))
+    assert len(engine) == 0
+    engine.log.close()
+    assert PeriodLog(path).read()[0] == []
+
+def test_log_open_elsewhere_is_refused(path):
+    log = PeriodLog(path)
+    with pytest.raises(RuntimeError):
+        PeriodLog(path)
+    log.append_columns(["a"], make_columns(1))
+    log.close()
+    assert PeriodLog(path).read()[0] == ["a"]
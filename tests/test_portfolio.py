@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from forecaster import StreamingForecaster
+from portfolio import compute_portfolio
+from roi_engine import ROIEngine
+
+@pytest.fixture(scope="module")
+def period_sets():
+    rng = np.random.default_rng(9)
+    sets = {}
+    for i in range(60):
+        # Every fifth tenant has no periods yet; others have one to 50
+        n = 0 if i % 5 == 0 else int(rng.integers(1, 51))
+        sets[f"t{i}"] = {
+            "cc_volume": rng.uniform(5e4, 9e5, n),
+            "cc_count": rng.integers(5, 50, n),
+            # Some tenants move little volume to ACH and never break even
+            "ach_volume": rng.uniform(0, 2e5 if i % 3 else 5e3, n),
+            "ach_count": rng.integers(10, 500, n),
+            "cc_rate": rng.choice([2.5, 2.9, 3.2], n),
+            "conv_fee": rng.choice([0.5, 1.0, 1.5], n),
+        }
+    return sets
+
+def expected_row(columns) -> dict:
+    engine = ROIEngine()
+    engine.add_columns([f"P{i}" for i in range(len(columns["cc_volume"]))], columns)
+    will_achieve_target, periods_to_roi, savings_rate = engine.analyze_roi_trajectory()
+    roi = engine.snapshot().roi
+    reached = np.flatnonzero(roi >= 0)
+    forecaster = StreamingForecaster()
+    forecaster.append(-engine.SUBSCRIPTION_COST)
+    forecaster.extend(roi)
+    # Like ROISnapshot, no projection from a single period
+    forecast = forecaster.break_even_period() if len(roi) >= 2 else None
+    assert forecast == engine.snapshot().break_even_period
+    return {
+        "periods": len(roi),
+        "roi": float(roi[-1]) if len(roi) else -engine.SUBSCRIPTION_COST,
+        "break_even_achieved": bool(len(roi) and roi[-1] >= 0),
+        "break_even_period": int(reached[0]) + 1 if len(reached) else -1,
+        "savings_rate": savings_rate,
+        "periods_to_roi": -1 if periods_to_roi is None else periods_to_roi,
+        "will_achieve_target": will_achieve_target,
+        "forecast_break_even_period": -1 if forecast is None else forecast,
+    }
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_portfolio_matches_engine_per_tenant(period_sets, workers):
+    summary = compute_portfolio(period_sets, workers=workers, chunks_per_worker=3)
+    rows = summary.rows()
+    assert [row["tenant_id"] for row in rows] == list(period_sets)
+    achieved = set()
+    for row, columns in zip(rows, period_sets.values()):
+        expected = expected_row(columns)
+        # Tenants without periods have no savings rate
+        savings_rate = np.nan if expected["savings_rate"] is None else expected["savings_rate"]
+        assert row.pop("savings_rate") == pytest.approx(savings_rate, rel=1e-9, nan_ok=True)
+        assert row.pop("roi") == pytest.approx(expected.pop("roi"), rel=1e-9, abs=1e-6)
+        expected.pop("savings_rate")
+        assert {name: value for name, value in row.items() if name != "tenant_id"} == expected
+        achieved.add(expected["break_even_achieved"])
+    # The tenants cover both outcomes
+    assert achieved == {True, False}
+
+def test_portfolio_of_empty_tenants():
+    empty = {name: [] for name in ("cc_volume", "cc_count", "ach_volume", "ach_count", "cc_rate", "conv_fee")}
+    summary = compute_portfolio({"a": empty, "b": empty}, workers=2)
+    assert summary.rows() == [
+        {"tenant_id": tenant_id, "periods": 0, "roi": -ROIEngine.SUBSCRIPTION_COST, "break_even_achieved": False,
+         "break_even_period": -1, "savings_rate": pytest.approx(np.nan, nan_ok=True), "periods_to_roi": -1,
+         "will_achieve_target": False, "forecast_break_even_period": -1}
+        for tenant_id in ("a", "b")
+    ]
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from roi_engine import ROIEngine, TransactionPeriod
+
+def make_engine(periods: int) -> ROIEngine:
+    engine = ROIEngine()
+    engine.add_periods([
+        TransactionPeriod(period=f"P{i}", cc_volume=900000.0 + 1000 * i, cc_count=10,
+                          ach_volume=50000.0, ach_count=20, cc_rate=2.9, conv_fee=1.0)
+        for i in range(periods)
+    ])
+    return engine
+
+def test_published_arrays_are_read_only():
+    engine = make_engine(5)
+    state = engine.state
+    snapshot = engine.snapshot()
+    arrays = [state.cumulative_savings, snapshot.cumulative_savings, snapshot.roi, snapshot.forecasts,
+              *state.columns.values(), *snapshot.columns.values()]
+    for array in arrays:
+        with pytest.raises(ValueError):
+            array[0] = 0
+    # Later writes still extend the engine's own buffers
+    engine.add_periods([TransactionPeriod(period="P5", cc_volume=900000.0, cc_count=10, ach_volume=50000.0,
+                                          ach_count=20, cc_rate=2.9, conv_fee=1.0)])
+    assert len(engine.snapshot().roi) == 6
+    np.testing.assert_array_equal(engine.snapshot().roi[:5], snapshot.roi)
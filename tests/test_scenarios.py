@@ -0,0 +1,66 @@
+import itertools
+import numpy as np
+import pytest
+import scenarios
+from roi_engine import ROIEngine, TransactionPeriod
+from scenarios import sweep_scenarios
+
+@pytest.fixture
+def periods():
+    rng = np.random.default_rng(5)
+    return [
+        TransactionPeriod(period=f"P{i}", cc_volume=float(rng.uniform(2e5, 9e5)), cc_count=int(rng.integers(5, 50)),
+                          ach_volume=float(rng.uniform(1e4, 2e5)), ach_count=int(rng.integers(10, 500)),
+                          cc_rate=float(rng.choice([2.5, 2.9, 3.2])), conv_fee=float(rng.choice([0.5, 1.0, 1.5])))
+        for i in range(40)
+    ]
+
+def engine_roi(periods, subscription_cost, ach_cost, cc_rate=None, conv_fee=None) -> np.ndarray:
+    """The ROI curve ROIEngine computes with the given constants, and rates overriding each period's."""
+    engine = ROIEngine()
+    engine.SUBSCRIPTION_COST = subscription_cost
+    engine.ACH_COST_PER_TRANSACTION = ach_cost
+    engine.add_periods([
+        TransactionPeriod(**{**vars(period),
+                             "cc_rate": period.cc_rate if cc_rate is None else cc_rate,
+                             "conv_fee": period.conv_fee if conv_fee is None else conv_fee})
+        for period in periods
+    ])
+    return engine.snapshot().roi
+
+@pytest.mark.parametrize("cc_rates, conv_fees", [(None, None), ([2.2, 3.5], None), (None, [0.0, 2.0]),
+                                                 ([2.2, 3.5], [0.0, 2.0])])
+def test_sweep_matches_engine(periods, monkeypatch, cc_rates, conv_fees):
+    # Small blocks, so the break-even search crosses block boundaries
+    monkeypatch.setattr(scenarios, "TIME_BLOCK", 7)
+    monkeypatch.setattr(scenarios, "BLOCK_CELLS", 20)
+    subscription_costs, ach_costs, targets = [50000, 170000, 900000], [0.1, 0.25, 3.0], [6, 12]
+    engine = ROIEngine()
+    engine.add_periods(periods)
+    columns = {name: np.asarray(column) for name, column in engine.snapshot().columns.items()}
+    result = sweep_scenarios(columns, subscription_costs, ach_costs, targets,
+                             cc_rates=cc_rates, conv_fees=conv_fees, include_curves=True)
+
+    grid = itertools.product(subscription_costs, ach_costs, targets, cc_rates or [None], conv_fees or [None])
+    for i, (subscription_cost, ach_cost, target, cc_rate, conv_fee) in enumerate(grid):
+        roi = engine_roi(periods, subscription_cost, ach_cost, cc_rate, conv_fee)
+        reached = np.flatnonzero(roi >= 0)
+        break_even = int(reached[0]) + 1 if len(reached) else -1
+        np.testing.assert_allclose(result["roi_curve"][i], roi, rtol=1e-9, atol=1e-6)
+        assert result["final_roi"][i] == pytest.approx(roi[-1], rel=1e-9, abs=1e-6)
+        assert result["break_even_period"][i] == break_even
+        assert result["achieves_target"][i] == (0 < break_even <= target)
+
+def test_engine_sweep_defaults_to_engine_constants(periods):
+    engine = ROIEngine()
+    engine.add_periods(periods)
+    result = engine.sweep_scenarios(current_period=25)
+    roi = engine.snapshot(25).roi
+    assert result["final_roi"].tolist() == pytest.approx([roi[-1]])
+    assert result["target_periods"].tolist() == [engine.TARGET_PERIODS_TO_ROI]
+
+def test_no_periods_never_break_even():
+    empty = {name: np.zeros(0) for name in ("cc_volume", "ach_volume", "ach_count", "cc_rate", "conv_fee")}
+    result = sweep_scenarios(empty, [100.0], [0.25], [12])
+    assert result["final_roi"].tolist() == [-100.0]
+    assert result["break_even_period"].tolist() == [-1]
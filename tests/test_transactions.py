@@ -0,0 +1,145 @@
+import csv
+import numpy as np
+import pytest
+import transactions
+from transactions import aggregate_transactions
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+HEADER = ["date", "period", "method", "amount"]
+
+def write_csv(path, rows) -> str:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+def write_parquet(path, rows) -> str:
+    columns = list(zip(*rows)) if rows else [[]] * len(HEADER)
+    pq.write_table(pa.table({name: pa.array(values, type=pa.string()) for name, values in zip(HEADER, columns)}),
+                   str(path), row_group_size=7)
+    return str(path)
+
+@pytest.fixture(params=["arrow", "csv"])
+def reader(request, monkeypatch) -> str:
+    if request.param == "csv":
+        # Fall back to the csv module, as without pyarrow installed
+        monkeypatch.setattr(transactions, "pa", None)
+    return request.param
+
+def expected_totals(rows, key):
+    """Card/ACH totals per period, in order of first appearance, summed one payment at a time."""
+    totals = {}
+    for row in rows:
+        period, method, amount = key(row), row[2].strip().lower(), float(row[3])
+        cc_volume, cc_count, ach_volume, ach_count = totals.setdefault(period, [0, 0, 0, 0])
+        if method in transactions.CC_METHODS:
+            totals[period][:2] = cc_volume + round(amount * 100), cc_count + 1
+        elif method in transactions.ACH_METHODS:
+            totals[period][2:] = ach_volume + round(amount * 100), ach_count + 1
+    return totals
+
+def assert_result(result, totals):
+    assert result.labels == list(totals)
+    values = np.array(list(totals.values())).reshape(-1, 4)
+    np.testing.assert_allclose(result.columns["cc_volume"], values[:, 0] / 100)
+    np.testing.assert_array_equal(result.columns["cc_count"], values[:, 1])
+    np.testing.assert_allclose(result.columns["ach_volume"], values[:, 2] / 100)
+    np.testing.assert_array_equal(result.columns["ach_count"], values[:, 3])
+
+def random_rows(n: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 400, n)
+    methods = rng.choice(["cc", "Card", "ach", "echeck", "cash"], n)
+    return [[str(np.datetime64("2023-01-01") + int(day)), f"P{day // 30}", method, f"{amount:.2f}"]
+            for day, method, amount in zip(days, methods, rng.uniform(1, 500, n))]
+
+@pytest.mark.parametrize("frequency, labels", [
+    ("day", ["2024-01-01", "2024-01-07", "2024-01-08", "2024-02-03"]),
+    # 2024-01-01 is a Monday; the Sunday after it is in the same week
+    ("week", ["2024-01-01", "2024-01-08", "2024-01-29"]),
+    ("month", ["2024-01", "2024-02"]),
+])
+def test_dates_are_bucketed_by_frequency(tmp_path, reader, frequency, labels):
+    rows = [["2024-02-03", "", "cc", "5"], ["2024-01-07", "", "cc", "1"], ["2024-01-01", "", "ach", "2"],
+            ["2024-01-08", "", "cc", "3"], ["2024-01-07T23:59:59", "", "ach", "4"]]
+    result = aggregate_transactions(write_csv(tmp_path / "p.csv", rows), 2.9, 1.0,
+                                    date_column="date", frequency=frequency)
+    assert result.labels == labels
+    assert result.rows == 5 and result.skipped == 0
+    assert result.columns["cc_volume"].sum() == 9 and result.columns["ach_count"].sum() == 2
+
+def test_week_buckets_start_on_monday(tmp_path, reader):
+    # A Sunday, then the Monday through Sunday of the next week
+    dates = [str(np.datetime64("2023-12-31") + i) for i in range(8)]
+    result = aggregate_transactions(write_csv(tmp_path / "p.csv", [[d, "", "cc", "1"] for d in dates]), 2.9, 1.0,
+                                    date_column="date", frequency="week")
+    assert result.labels == ["2023-12-25", "2024-01-01"]
+    np.testing.assert_array_equal(result.columns["cc_count"], [1, 7])
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_labels_keep_their_order_across_chunks(tmp_path, monkeypatch, workers, file_format):
+    rows = random_rows(200)
+    if file_format == "csv":
+        # Arrow reads CSV in blocks of at least a megabyte; chunk small files with the csv module
+        monkeypatch.setattr(transactions, "pa", None)
+        path = write_csv(tmp_path / "p.csv", rows)
+    else:
+        path = write_parquet(tmp_path / "p.parquet", rows)
+    result = aggregate_transactions(path, 2.9, 1.0, period_column="period", chunk_rows=7, workers=workers)
+    assert_result(result, expected_totals(rows, key=lambda row: row[1]))
+    assert result.rows == 200
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_workers_match_a_single_pass(tmp_path, reader, workers):
+    rows = random_rows(500)
+    path = write_csv(tmp_path / "p.csv", rows)
+    result = aggregate_transactions(path, 2.9, 1.0, date_column="date", frequency="month",
+                                    chunk_rows=11, workers=workers)
+    totals = expected_totals(sorted(rows), key=lambda row: row[0][:7])
+    assert_result(result, totals)
+    assert result.skipped == sum(row[2] == "cash" for row in rows)
+    np.testing.assert_array_equal(result.columns["cc_rate"], np.full(len(totals), 2.9))
+
+def test_null_and_malformed_rows_are_skipped(tmp_path, reader):
+    rows = [
+        ["2024-01-02", "", "cc", "10.50"],
+        ["2024-01-03", "", "ach", "abc"],        # Malformed amount
+        ["2024-01-04", "", "cc", ""],            # Missing amount
+        ["2024-01-05", "", "cc", "1e400"],       # Not finite
+        ["not a date", "", "cc", "3"],           # Malformed date
+        ["2024-13-01", "", "ach", "3"],          # Impossible date
+        ["", "", "ach", "3"],                    # Missing date
+        ["2024-01-06", "", "", "4"],             # Missing method
+        ["2024-02-01", "", "ach", "7.25"],
+    ]
+    result = aggregate_transactions(write_csv(tmp_path / "p.csv", rows), 2.9, 1.0,
+                                    date_column="date", frequency="month")
+    assert result.labels == ["2024-01", "2024-02"]
+    assert result.rows == 9 and result.skipped == 7
+    np.testing.assert_array_equal(result.columns["cc_volume"], [10.5, 0])
+    np.testing.assert_array_equal(result.columns["ach_volume"], [0, 7.25])
+
+def test_blank_labels_are_skipped(tmp_path, reader):
+    rows = [["", "P1", "cc", "1"], ["", "", "cc", "2"], ["", "P2", "ach", "3"]]
+    result = aggregate_transactions(write_csv(tmp_path / "p.csv", rows), 2.9, 1.0, period_column="period")
+    assert result.labels == ["P1", "P2"] and result.skipped == 1
+
+@pytest.mark.parametrize("options", [dict(period_column="period"), dict(date_column="date", frequency="week")])
+def test_arrow_and_csv_fallback_agree(tmp_path, monkeypatch, options):
+    rows = random_rows(300, seed=11)
+    for i in range(0, 300, 17):
+        rows[i][3] = "n/a"
+    for i in range(5, 300, 23):
+        rows[i][0] = "2024-02-30"
+    path = write_csv(tmp_path / "p.csv", rows)
+    arrow = aggregate_transactions(path, 2.9, 1.0, chunk_rows=13, **options)
+    monkeypatch.setattr(transactions, "pa", None)
+    fallback = aggregate_transactions(path, 2.9, 1.0, chunk_rows=13, **options)
+    assert arrow.labels == fallback.labels
+    assert (arrow.rows, arrow.skipped) == (fallback.rows, fallback.skipped)
+    for name, column in arrow.columns.items():
+        np.testing.assert_array_equal(column, fallback.columns[name])